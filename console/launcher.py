@@ -1,6 +1,6 @@
 import argparse
 
-from console.process import ConsoleStitchProcess
+from core.detectors import detector_names
 
 
 def launch():
@@ -34,12 +34,20 @@ def launch():
         default=-1,
         help='[Advanced] Forces Fixed Width for All Output Image Files, Default=None (Disabled)',
     )
+    parser.add_argument(
+        "-rq",
+        type=str,
+        dest='resample_quality',
+        default='best',
+        choices=['best', 'balanced', 'fast'],
+        help='[Advanced] Sets the resampling quality used to enforce the custom width, Default=best',
+    )
     parser.add_argument(
         "-dt",
         type=str,
         dest='detection_type',
         default='pixel',
-        choices=['none', 'pixel'],
+        choices=detector_names(),
         help='[Advanced] Sets the type of Slice Location Detection, Default=pixel (Pixel Comparison)',
     )
     parser.add_argument(
@@ -76,7 +84,79 @@ def launch():
         metavar="[1-100]",
         help='[Advanced] Sets the value of Scan Line Step, Default=5 (5px)',
     )
+    parser.add_argument(
+        "-sp",
+        type=str,
+        dest='slice_planner',
+        default='greedy',
+        choices=['greedy', 'optimal'],
+        help='[Advanced] Sets how slice points are picked by the indexed detector, Default=greedy (Same as Pixel Comparison)',
+    )
+    parser.add_argument(
+        "-pc",
+        dest='profile_cache_size',
+        type=int,
+        default=0,
+        metavar="SIZE_MB",
+        help='[Advanced] Caches detection row profiles for faster reruns, up to SIZE_MB megabytes, Default=0 (Disabled)',
+    )
+    parser.add_argument(
+        "-pca",
+        dest='profile_cache_age',
+        type=int,
+        default=0,
+        metavar="DAYS",
+        help='[Advanced] Drops cached row profiles unused for more than DAYS days, Default=0 (Never)',
+    )
+    parser.add_argument(
+        "-eb",
+        type=str,
+        dest='executor_backend',
+        default='process',
+        choices=['process', 'thread', 'serial', 'auto'],
+        help='[Advanced] Sets where images are loaded, resized and saved in parallel, auto benchmarks a sample of the input first, Default=process',
+    )
+    parser.add_argument(
+        "-ew",
+        dest='max_workers',
+        type=int,
+        default=0,
+        metavar="WORKERS",
+        help='[Advanced] Sets the number of parallel workers, Default=0 (CPU count)',
+    )
+    parser.add_argument(
+        "-cml",
+        dest='canvas_memory_limit',
+        type=int,
+        default=0,
+        metavar="SIZE_MB",
+        help='[Advanced] Keeps combined images bigger than SIZE_MB megabytes in a memory mapped scratch file instead of in memory, Default=0 (Disabled)',
+    )
+    parser.add_argument(
+        "-sd",
+        dest='scratch_directory',
+        type=str,
+        default='',
+        metavar="SCRATCH_DIRECTORY",
+        help='[Advanced] Sets the directory of the scratch files, Default=the system temp directory',
+    )
+    parser.add_argument(
+        "-rw",
+        dest='rolling_window',
+        action='store_true',
+        help='[Advanced] Slices and saves images while they load without building the combined image, for greedy planning detectors, Default=False',
+    )
+    parser.add_argument(
+        "-pt",
+        dest='passthrough_sources',
+        action='store_true',
+        help='[Advanced] Copies input files that end up unchanged as an output image instead of encoding them again, Default=False',
+    )
     kwargs = vars(parser.parse_args())
+    # Imported once the arguments are parsed, so -h and argument errors do not
+    # wait for the image libraries to load.
+    from console.process import ConsoleStitchProcess
+
     process = ConsoleStitchProcess()
     process.run(kwargs)
 
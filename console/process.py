@@ -1,19 +1,51 @@
+import functools
 import gc
 from time import time
 
-from core.detectors import select_detector
-from core.services import DirectoryExplorer, ImageHandler, ImageManipulator, logFunc
-from core.utils.constants import WIDTH_ENFORCEMENT
+from core.services import (
+    DirectoryExplorer,
+    DirectoryStitcher,
+    ImageHandler,
+    ImageManipulator,
+    WorkerPool,
+    logFunc,
+)
+from core.services.directory_stitcher import STAGE_MESSAGES
+from core.utils.constants import RESAMPLE_QUALITY, WIDTH_ENFORCEMENT
 
 
 class ConsoleStitchProcess:
+    def print_stage(self, iteration: int, count: int, stage: str):
+        print(
+            '[{iteration}/{count}] {message}'.format(
+                iteration=iteration, count=count, message=STAGE_MESSAGES[stage]
+            )
+        )
+
     @logFunc(inclass=True)
     def run(self, kwargs: dict[str:any]):
         # Initialize Services
-        explorer = DirectoryExplorer()
-        img_handler = ImageHandler()
-        img_manipulator = ImageManipulator()
-        detector = select_detector(detection_type=kwargs.get('detection_type'))
+        explorer = DirectoryExplorer(probe_headers=True)
+        worker_pool = WorkerPool(
+            max_workers=kwargs.get('max_workers'),
+            backend=kwargs.get('executor_backend'),
+        )
+        img_handler = ImageHandler(executor=worker_pool)
+        img_manipulator = ImageManipulator(
+            executor=worker_pool,
+            canvas_memory_limit=kwargs.get('canvas_memory_limit'),
+            scratch_directory=kwargs.get('scratch_directory'),
+        )
+        dir_stitcher = DirectoryStitcher(
+            img_handler,
+            img_manipulator,
+            kwargs.get('detection_type'),
+            slice_planner=kwargs.get('slice_planner'),
+            rolling_window=kwargs.get('rolling_window'),
+            profile_cache_size=kwargs.get('profile_cache_size'),
+            profile_cache_age=kwargs.get('profile_cache_age'),
+        )
+        resample_quality = RESAMPLE_QUALITY[kwargs.get('resample_quality').upper()]
         width_enforce_mode = (
             WIDTH_ENFORCEMENT.MANUAL
             if kwargs.get('custom_width') > 0
@@ -28,66 +60,50 @@ class ConsoleStitchProcess:
         input_dirs_count = len(input_dirs)
         print('[{count}] Working directories were found'.format(count=input_dirs_count))
         dir_iteration = 1
-        for dir in input_dirs:
-            print(
-                '-> Starting stitching process for working directory #{iteration} <-'.format(
-                    iteration=dir_iteration
+        try:
+            if kwargs.get('executor_backend') == 'auto' and input_dirs:
+                print('Benchmarking executor backends on a sample of the images')
+                backend, workers = worker_pool.autotune(
+                    img_handler.sample_loader(input_dirs[0]), kwargs.get('max_workers')
                 )
-            )
-            print(
-                '[{iteration}/{count}] Preparing & loading images Into memory'.format(
-                    iteration=dir_iteration, count=input_dirs_count
+                print(
+                    'Using the {backend} backend with {workers} workers'.format(
+                        backend=backend.name.lower(), workers=workers
+                    )
                 )
-            )
-            imgs = img_handler.load(dir)
-            imgs = img_manipulator.resize(
-                imgs, width_enforce_mode, kwargs.get('custom_width')
-            )
-            print(
-                '[{iteration}/{count}] Combining images into a single combined image'.format(
-                    iteration=dir_iteration, count=input_dirs_count
+            for dir in input_dirs:
+                print(
+                    '-> Starting stitching process for working directory #{iteration} <-'.format(
+                        iteration=dir_iteration
+                    )
                 )
-            )
-            combined_img = img_manipulator.combine(imgs)
-            print(
-                '[{iteration}/{count}] Detecting & selecting valid slicing points'.format(
-                    iteration=dir_iteration, count=input_dirs_count
+                img_count = dir_stitcher.run(
+                    dir,
+                    split_height=kwargs.get("split_height"),
+                    sensitivity=kwargs.get("detection_senstivity"),
+                    ignorable_pixels=kwargs.get("ignorable_pixels"),
+                    scan_step=kwargs.get("scan_line_step"),
+                    enforce_type=width_enforce_mode,
+                    enforce_width=kwargs.get('custom_width'),
+                    resample_quality=resample_quality,
+                    img_format=kwargs.get("output_type"),
+                    quality=kwargs.get('lossy_quality'),
+                    passthrough_sources=kwargs.get('passthrough_sources'),
+                    stage_func=functools.partial(
+                        self.print_stage, dir_iteration, input_dirs_count
+                    ),
                 )
-            )
-            slice_points = detector.run(
-                combined_img,
-                kwargs.get("split_height"),
-                sensitivity=kwargs.get("detection_senstivity"),
-                ignorable_pixels=kwargs.get("ignorable_pixels"),
-                scan_step=kwargs.get("scan_line_step"),
-            )
-            print(
-                '[{iteration}/{count}] Generating sliced output images in memory'.format(
-                    iteration=dir_iteration, count=input_dirs_count
-                )
-            )
-            imgs = img_manipulator.slice(combined_img, slice_points)
-            print(
-                '[{iteration}/{count}] Saving output images to storage (parallel)'.format(
-                    iteration=dir_iteration, count=input_dirs_count
+                print(
+                    '[{iteration}/{count}] {count_imgs} images saved successfully'.format(
+                        iteration=dir_iteration,
+                        count=input_dirs_count,
+                        count_imgs=img_count,
+                    )
                 )
-            )
-            img_count = len(imgs)
-            img_handler.save_all(
-                dir,
-                imgs,
-                img_format=kwargs.get("output_type"),
-                quality=kwargs.get('lossy_quality'),
-            )
-            print(
-                '[{iteration}/{count}] {count_imgs} images saved successfully'.format(
-                    iteration=dir_iteration,
-                    count=input_dirs_count,
-                    count_imgs=img_count,
-                )
-            )
-            dir_iteration += 1
-            gc.collect()
+                dir_iteration += 1
+                gc.collect()
+        finally:
+            worker_pool.shutdown()
         end_time = time()
         print(
             '--- Process completed in {time:.3f} seconds ---'.format(
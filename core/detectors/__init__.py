@@ -1,5 +1,37 @@
-from .direct_slicing import DirectSlicingDetector
-from .pixel_comparison import PixelComparisonDetector
-from .selector import select_detector
+import importlib
 
-__all__ = [DirectSlicingDetector, PixelComparisonDetector, select_detector]
+from .selector import (
+    DETECTOR_MODULES,
+    detector_capabilities,
+    detector_names,
+    load_detector_class,
+    select_detector,
+)
+
+__all__ = [
+    'DirectSlicingDetector',
+    'PixelComparisonDetector',
+    'IndexedPixelComparisonDetector',
+    'MultiResolutionDetector',
+    'UniformGutterDetector',
+    'RollingSliceWalk',
+    'VirtualCanvas',
+    'detector_capabilities',
+    'detector_names',
+    'load_detector_class',
+    'select_detector',
+]
+
+
+def __getattr__(name: str):
+    # Detector classes, the virtual canvas and the slice walk are imported on
+    # first access, so importing this package does not pull in every detector
+    # and dependency.
+    if name == 'VirtualCanvas':
+        return importlib.import_module('.virtual_canvas', __name__).VirtualCanvas
+    if name == 'RollingSliceWalk':
+        return importlib.import_module('.row_profile', __name__).RollingSliceWalk
+    for _, module_name, class_name in DETECTOR_MODULES.values():
+        if name == class_name:
+            return getattr(importlib.import_module(module_name, __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,13 +1,23 @@
+import numpy as np
 from PIL import Image as pil
 
 from core.services.global_logger import logFunc
+from core.utils.constants import DETECTOR_CAPABILITY
 
 
 class DirectSlicingDetector:
+    capabilities = (
+        DETECTOR_CAPABILITY.HEIGHTS_ONLY
+        | DETECTOR_CAPABILITY.VIRTUAL_CANVAS
+        | DETECTOR_CAPABILITY.GREEDY_WALK
+    )
+
     @logFunc(inclass=True)
     def run(self, combined_img: pil.Image, split_height: int, **kwargs) -> list[int]:
-        # Changes from a pil image to an numpy pixel array
-        last_row = combined_img.size[1]
+        return self.slice_locations(combined_img.size[1], split_height)
+
+    def slice_locations(self, last_row: int, split_height: int) -> list[int]:
+        """Gets the slice locations of a combined image last_row rows tall."""
         # Initializes some variables
         slice_locations = [0]
         row = split_height
@@ -17,3 +27,7 @@ class DirectSlicingDetector:
         if slice_locations[-1] != last_row - 1:
             slice_locations.append(last_row - 1)
         return slice_locations
+
+    def sliceable_rows(self, rows_img: pil.Image, **kwargs) -> np.ndarray:
+        """Every row can be sliced, the walk then slices every split_height rows."""
+        return np.ones(rows_img.size[1], dtype=bool)
@@ -0,0 +1,66 @@
+import numpy as np
+from PIL import Image as pil
+
+from core.services.global_logger import logFunc
+from core.utils.constants import DETECTOR_CAPABILITY, SLICE_PLANNER
+
+from .parallel_profile import compute_row_profile_parallel
+from .row_profile import as_grayscale, compute_row_profile, sensitivity_threshold
+from .slice_planner import plan_slice_locations
+
+
+class IndexedPixelComparisonDetector:
+    capabilities = (
+        DETECTOR_CAPABILITY.ROW_BANDS
+        | DETECTOR_CAPABILITY.VIRTUAL_CANVAS
+        | DETECTOR_CAPABILITY.GREEDY_WALK
+        | DETECTOR_CAPABILITY.PROFILE_CACHE
+    )
+
+    @logFunc(inclass=True)
+    def run(self, combined_img: pil.Image, split_height: int, **kwargs) -> list[int]:
+        """Uses a precomputed sliceable row index to detect ideal slice locations
+
+        With the greedy planner it gives the same slice locations as
+        PixelComparisonDetector, but scans every row once instead of re-testing
+        rows while walking up and down the image. The optimal planner instead
+        picks the cuts that keep all slices closest to split_height. Tall
+        canvases are profiled in row bands across max_workers processes, or the
+        workers of a shared executor. When a profile_cache and cache_key are
+        given, cached profiles skip the scan.
+        """
+        # Setting up rest of Detector Parameters
+        scan_step = kwargs.get('scan_step', 5)
+        ignorable_pixels = kwargs.get('ignorable_pixels', 0)
+        sensitivity = kwargs.get('sensitivity', 90)
+        slice_planner = kwargs.get('slice_planner', SLICE_PLANNER.GREEDY)
+        max_workers = kwargs.get('max_workers', None)
+        executor = kwargs.get('executor', None)
+        profile_cache = kwargs.get('profile_cache', None)
+        cache_key = kwargs.get('cache_key', None)
+        threshold = sensitivity_threshold(sensitivity)
+        # Detector Main Logic
+        row_profile = None
+        if profile_cache and cache_key:
+            row_profile = profile_cache.load(cache_key)
+        if row_profile is None or len(row_profile) != combined_img.size[1]:
+            # Workers convert their own bands of rows to grayscale
+            row_profile = compute_row_profile_parallel(
+                combined_img, ignorable_pixels, max_workers, executor
+            )
+            if profile_cache and cache_key:
+                profile_cache.save(cache_key, row_profile)
+        return plan_slice_locations(
+            row_profile <= threshold, split_height, scan_step, slice_planner
+        )
+
+    def sliceable_rows(self, rows_img: pil.Image, **kwargs) -> np.ndarray:
+        """Flags the sliceable rows of a full width band of the combined image.
+
+        Only the greedy planner walks the rows in order, the optimal one needs
+        the flags of the whole image at once.
+        """
+        ignorable_pixels = kwargs.get('ignorable_pixels', 0)
+        threshold = sensitivity_threshold(kwargs.get('sensitivity', 90))
+        row_profile = compute_row_profile(as_grayscale(rows_img), ignorable_pixels)
+        return row_profile <= threshold
@@ -0,0 +1,95 @@
+import math
+
+import numpy as np
+from PIL import Image as pil
+
+from core.services.global_logger import logFunc
+from core.utils.constants import DETECTOR_CAPABILITY
+
+from .row_profile import compute_row_profile, sensitivity_threshold
+
+# Width the grayscale proxy is reduced towards, and its fixed row reduction.
+PROXY_TARGET_WIDTH = 256
+PROXY_ROW_FACTOR = 2
+
+
+class MultiResolutionDetector:
+    capabilities = DETECTOR_CAPABILITY.NONE
+
+    @logFunc(inclass=True)
+    def run(self, combined_img: pil.Image, split_height: int, **kwargs) -> list[int]:
+        """Uses a coarse to fine pixel comparison to detect ideal slice locations
+
+        Candidate rows are found on a subsampled grayscale proxy of the image, and
+        only candidates are compared at full resolution while walking like the
+        PixelComparisonDetector. Clean rows in a band at least PROXY_ROW_FACTOR
+        rows tall are never missed, thinner ones can be, so slice locations may
+        differ slightly from the PixelComparisonDetector ones.
+        """
+        # Setting up rest of Detector Parameters
+        scan_step = kwargs.get('scan_step', 5)
+        ignorable_pixels = kwargs.get('ignorable_pixels', 0)
+        sensitivity = kwargs.get('sensitivity', 90)
+        threshold = sensitivity_threshold(sensitivity)
+        width, last_row = combined_img.size
+        candidate_rows = self.find_candidate_rows(
+            combined_img, ignorable_pixels, threshold
+        )
+        # Initializes some variables
+        slice_locations = [0]
+        row = split_height
+        move_up = True
+        # Detector Main Logic
+        while row < last_row:
+            can_slice = bool(candidate_rows[row])
+            if can_slice:
+                row_img = combined_img.crop((0, row, width, row + 1)).convert('L')
+                row_profile = compute_row_profile(np.array(row_img), ignorable_pixels)
+                can_slice = row_profile[0] <= threshold
+            if can_slice:
+                slice_locations.append(row)
+                row += split_height
+                move_up = True
+                continue
+            if row - slice_locations[-1] <= 0.4 * split_height:
+                row = slice_locations[-1] + split_height
+                move_up = False
+            if move_up:
+                row -= scan_step
+                continue
+            row += scan_step
+        if slice_locations[-1] != last_row - 1:
+            slice_locations.append(last_row - 1)
+        return slice_locations
+
+    def find_candidate_rows(
+        self, combined_img: pil.Image, ignorable_pixels: int, threshold: int
+    ) -> np.ndarray:
+        """Flags the rows that might be sliceable using a subsampled proxy image."""
+        width, last_row = combined_img.size
+        first_col = ignorable_pixels
+        last_col = max(first_col, width - ignorable_pixels)
+        if last_col - first_col < 2:
+            return np.ones(last_row, dtype=bool)
+        # Sampled pixels are at most col_factor apart, so a sliceable row can not
+        # differ by more than col_factor * threshold between them.
+        col_factor = max(1, (last_col - first_col) // PROXY_TARGET_WIDTH)
+        proxy_size = (
+            math.ceil((last_col - first_col) / col_factor),
+            math.ceil(last_row / PROXY_ROW_FACTOR),
+        )
+        proxy_img = combined_img.resize(
+            proxy_size, pil.NEAREST, box=(first_col, 0, last_col, last_row)
+        )
+        proxy_img = np.array(proxy_img.convert('L'))
+        proxy_rows = compute_row_profile(proxy_img) <= col_factor * threshold
+        # Every row lies within PROXY_ROW_FACTOR rows of a sampled row in the same
+        # clean band, so candidates are the rows around each passing sample.
+        row_scale = last_row / proxy_size[1]
+        sampled_rows = ((np.flatnonzero(proxy_rows) + 0.5) * row_scale).astype(np.int64)
+        band_edges = np.zeros(last_row + 1, dtype=np.int32)
+        np.add.at(band_edges, np.clip(sampled_rows - PROXY_ROW_FACTOR, 0, last_row), 1)
+        np.add.at(
+            band_edges, np.clip(sampled_rows + PROXY_ROW_FACTOR + 1, 0, last_row), -1
+        )
+        return np.cumsum(band_edges[:-1]) > 0
@@ -0,0 +1,96 @@
+from concurrent.futures import Executor, ThreadPoolExecutor
+from contextlib import nullcontext
+from multiprocessing import cpu_count
+
+import numpy as np
+from PIL import Image as pil
+
+from core.services.canvas import canvas_rows
+from core.services.pixel_buffers import open_shared_image, share_images
+from core.services.worker_pool import borrow_executor, runs_in_process
+
+from .row_profile import as_grayscale, compute_row_profile
+from .virtual_canvas import VirtualCanvas
+
+# Canvases smaller than this are profiled in process, workers would not pay off.
+PARALLEL_MIN_PIXELS = 16_000_000
+# Bands handed out per worker, a few per worker evens out uneven bands.
+BANDS_PER_WORKER = 4
+
+
+# Module-level function for multiprocessing (must be picklable)
+def _row_profile_worker(args: tuple) -> np.ndarray:
+    """Worker function to compute the row profile of a band of a shared canvas."""
+    rows_ref, ignorable_pixels = args
+    with open_shared_image(rows_ref) as rows_img:
+        gray_rows = np.asarray(rows_img.convert('L'))
+    return compute_row_profile(gray_rows, ignorable_pixels)
+
+
+def grayscale_rows(
+    combined_img: pil.Image | VirtualCanvas, top: int, bottom: int
+) -> np.ndarray:
+    """Gets the grayscale pixels of rows [top, bottom) of a combined image."""
+    if isinstance(combined_img, VirtualCanvas):
+        return combined_img.rows(top, bottom)
+    return np.asarray(canvas_rows(combined_img, top, bottom).convert('L'))
+
+
+def compute_row_profile_parallel(
+    combined_img: pil.Image | VirtualCanvas,
+    ignorable_pixels: int = 0,
+    max_workers: int = None,
+    executor: Executor = None,
+) -> np.ndarray:
+    """Computes the row profile of a combined image across workers.
+
+    The image is split into row bands and every worker converts its own band
+    to grayscale and profiles it, so nothing but handing out the bands runs in
+    this process. Each row is compared only against itself, so bands need no
+    overlapping rows and the band profiles are simply concatenated back in
+    order. A shared executor (like a WorkerPool) is used when given instead of
+    starting a pool. Worker processes read the bands of a canvas combine put
+    in shared memory or a scratch file in place. Anything else (virtual
+    canvases, other images, or executors running tasks in this process) is
+    read by threads, PIL and numpy release the GIL while converting and
+    diffing.
+    """
+    max_workers = max_workers or getattr(executor, 'max_workers', None) or cpu_count()
+    width, height = combined_img.size
+    if max_workers <= 1 or height * width < PARALLEL_MIN_PIXELS:
+        return compute_row_profile(as_grayscale(combined_img), ignorable_pixels)
+    band_count = min(height, max_workers * BANDS_PER_WORKER)
+    band_edges = np.linspace(0, height, band_count + 1, dtype=np.int64)
+    bands = [
+        (int(top), int(bottom)) for top, bottom in zip(band_edges[:-1], band_edges[1:])
+    ]
+    in_process = runs_in_process(executor)
+    shared_canvas = (
+        getattr(combined_img, 'canvas', None) is not None
+        and getattr(combined_img, 'shared_block', None) is not None
+    )
+    if in_process or not shared_canvas:
+        with (
+            nullcontext(executor) if in_process else ThreadPoolExecutor(max_workers)
+        ) as pool:
+            band_profiles = list(
+                pool.map(
+                    lambda band: compute_row_profile(
+                        grayscale_rows(combined_img, *band), ignorable_pixels
+                    ),
+                    bands,
+                )
+            )
+        return np.concatenate(band_profiles)
+    # Bands are views of the shared canvas, referenced by workers without a copy
+    _, rows_refs = share_images(
+        [canvas_rows(combined_img, top, bottom) for top, bottom in bands]
+    )
+    with borrow_executor(executor, max_workers) as pool:
+        band_profiles = list(
+            pool.map(
+                _row_profile_worker,
+                [(rows_ref, ignorable_pixels) for rows_ref in rows_refs],
+            )
+        )
+    return np.concatenate(band_profiles)
@@ -2,37 +2,37 @@ import numpy as np
 from PIL import Image as pil
 
 from core.services.global_logger import logFunc
+from core.utils.constants import DETECTOR_CAPABILITY
+
+from .row_profile import as_grayscale, compute_row_profile, sensitivity_threshold
 
 
 class PixelComparisonDetector:
+    capabilities = DETECTOR_CAPABILITY.VIRTUAL_CANVAS | DETECTOR_CAPABILITY.GREEDY_WALK
+
     @logFunc(inclass=True)
     def run(self, combined_img: pil.Image, split_height: int, **kwargs) -> list[int]:
         """Uses Neighbouring pixels comparison to detect ideal slice locations"""
-        # Changes from a pil Image to an numpy pixel array
-        combined_img = np.array(combined_img.convert('L'))
+        # Changes from a pil Image (or virtual canvas) to grayscale pixel rows
+        combined_img = as_grayscale(combined_img)
         # Setting up rest of Detector Parameters
         scan_step = kwargs.get('scan_step', 5)
         ignorable_pixels = kwargs.get('ignorable_pixels', 0)
         sensitivity = kwargs.get('sensitivity', 90)
-        threshold = int(255 * (1 - (sensitivity / 100)))
+        threshold = sensitivity_threshold(sensitivity)
         last_row = len(combined_img)
+        # Only the pixels between the ignorable margins are compared
+        first_col = ignorable_pixels
+        last_col = max(first_col, combined_img.shape[1] - ignorable_pixels)
         # Initializes some variables
         slice_locations = [0]
         row = split_height
         move_up = True
         # Detector Main Logic
         while row < last_row:
-            row_pixels = combined_img[row]
-            can_slice = True
-            for index in range(
-                ignorable_pixels + 1, len(row_pixels) - ignorable_pixels
-            ):
-                prev_pixel = int(row_pixels[index - 1])
-                next_pixel = int(row_pixels[index])
-                value_diff = next_pixel - prev_pixel
-                if value_diff > threshold or value_diff < -threshold:
-                    can_slice = False
-                    break
+            row_pixels = combined_img[row, first_col:last_col].astype(np.int16)
+            value_diffs = np.abs(np.diff(row_pixels))
+            can_slice = value_diffs.size == 0 or value_diffs.max() <= threshold
             if can_slice:
                 slice_locations.append(row)
                 row += split_height
@@ -48,3 +48,10 @@ class PixelComparisonDetector:
         if slice_locations[-1] != last_row - 1:
             slice_locations.append(last_row - 1)
         return slice_locations
+
+    def sliceable_rows(self, rows_img: pil.Image, **kwargs) -> np.ndarray:
+        """Flags the sliceable rows of a full width band of the combined image."""
+        ignorable_pixels = kwargs.get('ignorable_pixels', 0)
+        threshold = sensitivity_threshold(kwargs.get('sensitivity', 90))
+        row_profile = compute_row_profile(as_grayscale(rows_img), ignorable_pixels)
+        return row_profile <= threshold
@@ -0,0 +1,224 @@
+import math
+
+import numpy as np
+from PIL import Image as pil
+
+from core.services.canvas import is_file_backed
+
+from .virtual_canvas import VirtualCanvas
+
+# Number of rows differenced at once, bounds the int16 scratch memory per chunk.
+PROFILE_CHUNK_ROWS = 2048
+
+
+def sensitivity_threshold(sensitivity: int) -> int:
+    """Converts a detection sensitivity percentage to a max pixel difference."""
+    return int(255 * (1 - (sensitivity / 100)))
+
+
+def as_grayscale(combined_img: pil.Image | VirtualCanvas) -> np.ndarray | VirtualCanvas:
+    """Gets grayscale rows of a combined image, virtual canvases read lazily.
+
+    Combined images kept in a scratch file are read lazily too, through a
+    virtual canvas, instead of being converted in memory all at once.
+    """
+    if isinstance(combined_img, VirtualCanvas):
+        return combined_img
+    if is_file_backed(combined_img):
+        return VirtualCanvas([combined_img])
+    return np.array(combined_img.convert('L'))
+
+
+def as_rgb(combined_img: pil.Image | VirtualCanvas) -> np.ndarray | VirtualCanvas:
+    """Gets RGB pixel rows of a combined image, see as_grayscale.
+
+    Canvases made by combine, in memory or in a scratch file, are read in place
+    without their padding channel.
+    """
+    if isinstance(combined_img, VirtualCanvas):
+        return VirtualCanvas(combined_img.img_objs, mode='RGB')
+    canvas = getattr(combined_img, 'canvas', None)
+    if canvas is not None:
+        return canvas[:, :, :3]
+    return np.array(combined_img.convert('RGB'))
+
+
+def compute_row_profile(
+    gray_img: np.ndarray,
+    ignorable_pixels: int = 0,
+    chunk_rows: int = PROFILE_CHUNK_ROWS,
+) -> np.ndarray:
+    """Computes the max neighbouring pixel difference of every row.
+
+    A row can be sliced by the pixel comparison detectors when its profile value
+    is lower or equal to the sensitivity threshold.
+    """
+    height, width = gray_img.shape[:2]
+    first_col = ignorable_pixels
+    last_col = max(first_col, width - ignorable_pixels)
+    profile = np.zeros(height, dtype=np.uint8)
+    if last_col - first_col < 2:
+        return profile
+    for top in range(0, height, chunk_rows):
+        rows = np.asarray(gray_img[top : top + chunk_rows, first_col:last_col])
+        value_diffs = np.abs(np.diff(rows.astype(np.int16), axis=1))
+        profile[top : top + len(rows)] = value_diffs.max(axis=1)
+    return profile
+
+
+def compute_row_range(
+    pixel_rows: np.ndarray,
+    ignorable_pixels: int = 0,
+    chunk_rows: int = PROFILE_CHUNK_ROWS,
+) -> np.ndarray:
+    """Computes the difference between the brightest and darkest pixel of every row.
+
+    For rows of colour pixels it is the widest range of any channel, so colours
+    of the same brightness still differ. Rows of a single solid colour, like
+    the gutters between panels, have a range of zero.
+    """
+    height, width = pixel_rows.shape[:2]
+    first_col = ignorable_pixels
+    last_col = max(first_col, width - ignorable_pixels)
+    row_range = np.zeros(height, dtype=np.uint8)
+    if last_col - first_col < 1:
+        return row_range
+    for top in range(0, height, chunk_rows):
+        rows = np.asarray(pixel_rows[top : top + chunk_rows, first_col:last_col])
+        rows_range = rows.max(axis=1) - rows.min(axis=1)
+        if rows_range.ndim > 1:
+            rows_range = rows_range.max(axis=1)
+        row_range[top : top + len(rows)] = rows_range
+    return row_range
+
+
+class SliceableRowIndex:
+    """Sorted index of sliceable rows, grouped by their offset in the scan step.
+
+    The pixel comparison walk only ever visits rows that are a multiple of
+    scan_step away from its starting row, so each lookup is a binary search in
+    the group of rows sharing that starting row's remainder.
+    """
+
+    def __init__(self, sliceable_rows: np.ndarray, scan_step: int):
+        self.sliceable_rows = sliceable_rows
+        self.scan_step = scan_step
+        rows = np.flatnonzero(sliceable_rows)
+        remainders = rows % scan_step
+        rows = rows[np.argsort(remainders, kind='stable')]
+        bounds = np.searchsorted(np.sort(remainders), np.arange(scan_step + 1))
+        self.groups = [rows[bounds[i] : bounds[i + 1]] for i in range(scan_step)]
+
+    def highest(self, low: int, high: int) -> int | None:
+        """Highest sliceable row in [low, high] reachable from high by scan steps."""
+        group = self.groups[high % self.scan_step]
+        index = np.searchsorted(group, high, side='right') - 1
+        if index >= 0 and group[index] >= max(low, 0):
+            return int(group[index])
+        # Negative rows wrap around to the bottom, just like numpy indexing.
+        row = high
+        if row >= 0:
+            row -= (high // self.scan_step + 1) * self.scan_step
+        while row >= low:
+            if self.sliceable_rows[row]:
+                return row
+            row -= self.scan_step
+        return None
+
+    def lowest(self, low: int, high: int) -> int | None:
+        """Lowest sliceable row in [low, high) reachable from low by scan steps."""
+        group = self.groups[low % self.scan_step]
+        index = np.searchsorted(group, low, side='left')
+        if index < len(group) and group[index] < high:
+            return int(group[index])
+        return None
+
+
+def walk_slice_locations(
+    sliceable_rows: np.ndarray, split_height: int, scan_step: int
+) -> list[int]:
+    """Replays the PixelComparisonDetector walk using a sliceable row index.
+
+    Moving up from each target row tests rows until the slice gets within
+    40% of split_height of the previous slice, then the walk restarts below
+    the target and moves down. Both phases are a single index lookup here.
+    """
+    index = SliceableRowIndex(sliceable_rows, scan_step)
+    last_row = len(sliceable_rows)
+    slice_locations = [0]
+    row = split_height
+    while row < last_row:
+        previous = slice_locations[-1]
+        # Steps taken upwards before the fallback jump back below the target.
+        fallback_gap = 0.4 * split_height
+        steps = max(0, math.ceil((row - previous - fallback_gap) / scan_step))
+        while steps > 0 and row - (steps - 1) * scan_step - previous <= fallback_gap:
+            steps -= 1
+        while row - steps * scan_step - previous > fallback_gap:
+            steps += 1
+        found = index.highest(row - steps * scan_step, row)
+        if found is None:
+            found = index.lowest(previous + split_height + scan_step, last_row)
+            if found is None:
+                break
+        slice_locations.append(found)
+        row = found + split_height
+    if slice_locations[-1] != last_row - 1:
+        slice_locations.append(last_row - 1)
+    return slice_locations
+
+
+class RollingSliceWalk:
+    """Replays walk_slice_locations on rows that become known in order.
+
+    Sliceable flags are handed to advance for the rows kept so far, starting at
+    the previous slice location, and every slice location that no later row
+    can change anymore is returned right away. The walk never looks above the
+    previous slice as long as scan_step is at most 40% of split_height.
+    """
+
+    def __init__(self, last_row: int, split_height: int, scan_step: int):
+        self.last_row = last_row
+        self.split_height = split_height
+        self.scan_step = scan_step
+        self.slice_locations = [0]
+        self.finished = False
+
+    def advance(self, sliceable_rows: np.ndarray, top: int) -> list[int]:
+        """Gets the new slice locations, given the flags of the rows from top on."""
+        known_rows = top + len(sliceable_rows)
+        new_locations = []
+        while not self.finished:
+            previous = self.slice_locations[-1]
+            row = previous + self.split_height
+            if row >= self.last_row or row >= known_rows:
+                # The last slice has to wait for the last row.
+                self.finished = known_rows >= self.last_row
+                break
+            # Same steps upwards as walk_slice_locations.
+            fallback_gap = 0.4 * self.split_height
+            steps = max(0, math.ceil((row - previous - fallback_gap) / self.scan_step))
+            while (
+                steps > 0
+                and row - (steps - 1) * self.scan_step - previous <= fallback_gap
+            ):
+                steps -= 1
+            while row - steps * self.scan_step - previous > fallback_gap:
+                steps += 1
+            upper_rows = np.arange(
+                row, row - steps * self.scan_step - 1, -self.scan_step
+            )
+            found = upper_rows[sliceable_rows[upper_rows - top]]
+            if not len(found):
+                first_lower = previous + self.split_height + self.scan_step
+                lower_rows = np.arange(first_lower, known_rows, self.scan_step)
+                found = lower_rows[sliceable_rows[lower_rows - top]]
+                if not len(found):
+                    self.finished = known_rows >= self.last_row
+                    break
+            self.slice_locations.append(int(found[0]))
+            new_locations.append(int(found[0]))
+        if self.finished and self.slice_locations[-1] != self.last_row - 1:
+            self.slice_locations.append(self.last_row - 1)
+            new_locations.append(self.last_row - 1)
+        return new_locations
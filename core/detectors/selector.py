@@ -1,18 +1,66 @@
-from core.utils.constants import DETECTION_TYPE
+import importlib
+from importlib.metadata import entry_points
 
-from ..services import logFunc
-from .direct_slicing import DirectSlicingDetector
-from .pixel_comparison import PixelComparisonDetector
+from core.services.global_logger import logFunc
+from core.utils.constants import DETECTION_TYPE, DETECTOR_CAPABILITY
+
+# Extra detectors shipped as separate packages register under this group,
+# with the entry point name used as their detection type.
+DETECTOR_ENTRY_POINT_GROUP = 'smartstitch.detectors'
+
+# Built-in detectors, imported only once they are selected.
+DETECTOR_MODULES = {
+    DETECTION_TYPE.NO_DETECTION: ('none', '.direct_slicing', 'DirectSlicingDetector'),
+    DETECTION_TYPE.PIXEL_COMPARISON: (
+        'pixel',
+        '.pixel_comparison',
+        'PixelComparisonDetector',
+    ),
+    DETECTION_TYPE.INDEXED_PIXEL_COMPARISON: (
+        'indexed',
+        '.indexed_pixel_comparison',
+        'IndexedPixelComparisonDetector',
+    ),
+    DETECTION_TYPE.MULTI_RESOLUTION: (
+        'multires',
+        '.multi_resolution',
+        'MultiResolutionDetector',
+    ),
+    DETECTION_TYPE.UNIFORM_GUTTER: (
+        'gutter',
+        '.uniform_gutter',
+        'UniformGutterDetector',
+    ),
+}
+
+
+def detector_names() -> list[str]:
+    """Lists the names of all built-in and plugin detection types."""
+    names = [name for name, _, _ in DETECTOR_MODULES.values()]
+    for entry_point in entry_points(group=DETECTOR_ENTRY_POINT_GROUP):
+        if entry_point.name not in names:
+            names.append(entry_point.name)
+    return names
+
+
+def load_detector_class(detection_type: str | DETECTION_TYPE) -> type:
+    """Imports the detector class of a detection type given by name or value."""
+    for value, (name, module_name, class_name) in DETECTOR_MODULES.items():
+        if detection_type == name or detection_type == value.value:
+            module = importlib.import_module(module_name, __package__)
+            return getattr(module, class_name)
+    for entry_point in entry_points(group=DETECTOR_ENTRY_POINT_GROUP):
+        if detection_type == entry_point.name:
+            return entry_point.load()
+    raise Exception("Invalid Detection Type")
+
+
+def detector_capabilities(detection_type: str | DETECTION_TYPE) -> DETECTOR_CAPABILITY:
+    """Gets the declared capabilities of a detection type's detector."""
+    detector_class = load_detector_class(detection_type)
+    return getattr(detector_class, 'capabilities', DETECTOR_CAPABILITY.NONE)
 
 
 @logFunc()
 def select_detector(detection_type: str | DETECTION_TYPE):
-    if detection_type == "none" or detection_type == DETECTION_TYPE.NO_DETECTION.value:
-        return DirectSlicingDetector()
-    elif (
-        detection_type == "pixel"
-        or detection_type == DETECTION_TYPE.PIXEL_COMPARISON.value
-    ):
-        return PixelComparisonDetector()
-    else:
-        raise Exception("Invalid Detection Type")
+    return load_detector_class(detection_type)()
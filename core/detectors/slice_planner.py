@@ -0,0 +1,75 @@
+import numpy as np
+
+from core.utils.constants import SLICE_PLANNER
+
+from .row_profile import walk_slice_locations
+
+
+def plan_slice_locations(
+    sliceable_rows: np.ndarray,
+    split_height: int,
+    scan_step: int,
+    planner: str | SLICE_PLANNER = SLICE_PLANNER.GREEDY,
+) -> list[int]:
+    """Picks slice locations from a sliceable row bitmap with the given planner."""
+    if planner == "optimal" or planner == SLICE_PLANNER.OPTIMAL.value:
+        return plan_optimal_slice_locations(sliceable_rows, split_height, scan_step)
+    return walk_slice_locations(sliceable_rows, split_height, scan_step)
+
+
+def plan_optimal_slice_locations(
+    sliceable_rows: np.ndarray, split_height: int, scan_step: int
+) -> list[int]:
+    """Picks the slice locations closest to split_height over the whole image.
+
+    Candidates are the sliceable rows every scan_step rows. The chosen cuts
+    minimise the sum of squared differences between each slice height and
+    split_height, which keeps every slice, the last one included, close to it.
+    Squared costs let the dynamic programming use a monotone convex hull of
+    lines, so planning is linear in the number of candidates.
+    """
+    last_row = len(sliceable_rows)
+    if last_row <= 1:
+        return [0]
+    grid_rows = np.arange(scan_step, last_row - 1, scan_step)
+    candidates = grid_rows[sliceable_rows[grid_rows]].tolist()
+    positions = [0] + candidates + [last_row - 1]
+    # cost[j] = min over i of cost[i] + (positions[j] - positions[i] - split_height)^2
+    # Each i is the line y = -2 * p_i * x + cost[i] + p_i^2 queried at
+    # x = p_j - split_height, with slopes decreasing and queries increasing.
+    cost = [0] * len(positions)
+    parent = [0] * len(positions)
+    hull_slopes, hull_intercepts, hull_index = [0], [0], [0]
+    front = 0
+    for j in range(1, len(positions)):
+        x = positions[j] - split_height
+        while front + 1 < len(hull_slopes) and (
+            hull_slopes[front + 1] * x + hull_intercepts[front + 1]
+            <= hull_slopes[front] * x + hull_intercepts[front]
+        ):
+            front += 1
+        best = hull_index[front]
+        cost[j] = hull_slopes[front] * x + hull_intercepts[front] + x * x
+        parent[j] = best
+        slope = -2 * positions[j]
+        intercept = cost[j] + positions[j] * positions[j]
+        # Drops lines that are no longer part of the lower hull.
+        while len(hull_slopes) - front >= 2 and (
+            (intercept - hull_intercepts[-2]) * (hull_slopes[-2] - hull_slopes[-1])
+            <= (hull_intercepts[-1] - hull_intercepts[-2]) * (hull_slopes[-2] - slope)
+        ):
+            hull_slopes.pop()
+            hull_intercepts.pop()
+            hull_index.pop()
+        hull_slopes.append(slope)
+        hull_intercepts.append(intercept)
+        hull_index.append(j)
+        front = min(front, len(hull_slopes) - 1)
+    # Walks back through the chosen predecessors from the last row.
+    slice_locations = [positions[-1]]
+    index = len(positions) - 1
+    while index > 0:
+        index = parent[index]
+        slice_locations.append(positions[index])
+    slice_locations.reverse()
+    return slice_locations
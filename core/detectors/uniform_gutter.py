@@ -0,0 +1,55 @@
+import numpy as np
+from PIL import Image as pil
+
+from core.services.global_logger import logFunc
+from core.utils.constants import DETECTOR_CAPABILITY
+
+from .row_profile import as_rgb, compute_row_range, sensitivity_threshold
+
+
+class UniformGutterDetector:
+    capabilities = DETECTOR_CAPABILITY.VIRTUAL_CANVAS
+
+    @logFunc(inclass=True)
+    def run(self, combined_img: pil.Image, split_height: int, **kwargs) -> list[int]:
+        """Uses solid colour gutters between panels to detect ideal slice locations
+
+        A row belongs to a gutter when the range of every colour channel is within
+        the sensitivity tolerance. For every slice, the longest gutter run between
+        40% and 100% of split_height below the previous slice is cut in its middle.
+        When there is none, the first gutter further down is cut in its middle
+        instead.
+        """
+        # Changes from a pil Image (or virtual canvas) to RGB pixel rows
+        combined_img = as_rgb(combined_img)
+        # Setting up rest of Detector Parameters
+        ignorable_pixels = kwargs.get('ignorable_pixels', 0)
+        sensitivity = kwargs.get('sensitivity', 90)
+        tolerance = sensitivity_threshold(sensitivity)
+        last_row = len(combined_img)
+        # Finds all the gutter runs as [start, end) row ranges
+        gutter_rows = compute_row_range(combined_img, ignorable_pixels) <= tolerance
+        run_edges = np.flatnonzero(np.diff(gutter_rows, prepend=False, append=False))
+        run_starts, run_ends = run_edges[::2], run_edges[1::2]
+        # Initializes some variables
+        slice_locations = [0]
+        # Detector Main Logic
+        while slice_locations[-1] + split_height < last_row:
+            window_top = slice_locations[-1] + int(0.4 * split_height) + 1
+            window_bottom = slice_locations[-1] + split_height + 1
+            first_run = np.searchsorted(run_ends, window_top, side='right')
+            last_run = np.searchsorted(run_starts, window_bottom, side='left')
+            if first_run < last_run:
+                starts = np.maximum(run_starts[first_run:last_run], window_top)
+                ends = np.minimum(run_ends[first_run:last_run], window_bottom)
+                # Longest run wins, ties go to the run closest to split_height.
+                longest = len(ends) - 1 - np.argmax((ends - starts)[::-1])
+                slice_locations.append(int(starts[longest] + ends[longest]) // 2)
+            elif last_run < len(run_starts):
+                start, end = run_starts[last_run], run_ends[last_run]
+                slice_locations.append(int(start + end) // 2)
+            else:
+                break
+        if slice_locations[-1] != last_row - 1:
+            slice_locations.append(last_row - 1)
+        return slice_locations
@@ -0,0 +1,55 @@
+import numpy as np
+from PIL import Image as pil
+
+
+class VirtualCanvas:
+    """Presents an ordered list of images as one vertically stacked canvas.
+
+    Indexing it like a numpy array returns rows fetched on demand from the
+    source images they belong to, matching what converting the combined image
+    to *mode* would give: 2D grayscale rows for L, rows of pixels with three
+    channels for RGB. Narrower images are padded with black on the right, just
+    like ImageManipulator.combine does.
+    """
+
+    def __init__(self, img_objs: list[pil.Image], mode: str = 'L'):
+        self.img_objs = img_objs
+        self.mode = mode
+        widths, heights = zip(*(img.size for img in img_objs))
+        self.size = (max(widths), sum(heights))
+        self.shape = (self.size[1], self.size[0])
+        self.offsets = np.cumsum((0,) + heights)
+
+    def __len__(self) -> int:
+        return self.size[1]
+
+    def __getitem__(self, key) -> np.ndarray:
+        row_key, col_key = key if isinstance(key, tuple) else (key, slice(None))
+        if isinstance(row_key, slice):
+            top, bottom, step = row_key.indices(len(self))
+            rows = self.rows(top, max(top, bottom))[::step]
+            return rows[:, col_key]
+        row = row_key + len(self) if row_key < 0 else row_key
+        if not 0 <= row < len(self):
+            raise IndexError(f'row {row_key} is out of bounds for {len(self)} rows')
+        return self.rows(row, row + 1)[0, col_key]
+
+    def rows(self, top: int, bottom: int) -> np.ndarray:
+        """Gets the pixels of rows [top, bottom) as an array, see the class."""
+        channels = (3,) if self.mode == 'RGB' else ()
+        rows = np.zeros((bottom - top, self.size[0]) + channels, dtype=np.uint8)
+        first_img = np.searchsorted(self.offsets, top, side='right') - 1
+        last_img = np.searchsorted(self.offsets, bottom, side='left')
+        for index in range(first_img, min(last_img, len(self.img_objs))):
+            img = self.img_objs[index]
+            img_top = int(self.offsets[index])
+            crop_top = max(top, img_top) - img_top
+            crop_bottom = min(bottom, img_top + img.size[1]) - img_top
+            img_rows = img.crop((0, crop_top, img.size[0], crop_bottom))
+            if img_rows.mode not in ('RGB', 'RGBA', 'RGBX', 'L'):
+                img_rows = img_rows.convert('RGB')
+            row_offset = img_top + crop_top - top
+            rows[row_offset : row_offset + crop_bottom - crop_top, : img.size[0]] = (
+                np.asarray(img_rows.convert(self.mode))
+            )
+        return rows
@@ -1,5 +1,6 @@
 from .app_profiles import AppProfiles
 from .app_settings import AppSettings
+from .image_metadata import ImageMetadata, ImageMetadataIndex
 from .work_directory import WorkDirectory
 
-__all__ = [AppProfiles, AppSettings, WorkDirectory]
+__all__ = [AppProfiles, AppSettings, ImageMetadata, ImageMetadataIndex, WorkDirectory]
@@ -1,4 +1,10 @@
-from ..utils.constants import DETECTION_TYPE, WIDTH_ENFORCEMENT
+from ..utils.constants import (
+    DETECTION_TYPE,
+    EXECUTOR_BACKEND,
+    RESAMPLE_QUALITY,
+    SLICE_PLANNER,
+    WIDTH_ENFORCEMENT,
+)
 
 
 class AppSettings:
@@ -13,8 +19,18 @@ class AppSettings:
         self.senstivity: int = 90
         self.ignorable_pixels: int = 5
         self.scan_step: int = 5
+        self.slice_planner: SLICE_PLANNER = SLICE_PLANNER.GREEDY
+        self.profile_cache_size: int = 0
+        self.profile_cache_age: int = 0
+        self.executor_backend: EXECUTOR_BACKEND = EXECUTOR_BACKEND.PROCESS
+        self.max_workers: int = 0
+        self.canvas_memory_limit: int = 0
+        self.scratch_directory: str = ""
+        self.rolling_window: bool = False
+        self.passthrough_sources: bool = False
         self.enforce_type: WIDTH_ENFORCEMENT = WIDTH_ENFORCEMENT.NONE
         self.enforce_width: int = 720
+        self.resample_quality: RESAMPLE_QUALITY = RESAMPLE_QUALITY.BEST
         self.run_postprocess: bool = False
         self.postprocess_app: str = ""
         self.postprocess_args: str = ""
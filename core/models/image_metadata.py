@@ -0,0 +1,72 @@
+from array import array
+from typing import NamedTuple
+
+
+class ImageMetadata(NamedTuple):
+    """Header information of a single image file"""
+
+    width: int
+    height: int
+    mode: str
+    format: str
+    byte_size: int
+    mtime_ns: int
+
+
+class ImageMetadataIndex:
+    """Model for holding the header information of every image of a directory
+
+    Values are kept in typed arrays, one per field, with modes and formats
+    stored as indices into small lookup tables. Images whose header could not
+    be read have a width and height of 0.
+    """
+
+    def __init__(self):
+        self.widths = array('I')
+        self.heights = array('I')
+        self.byte_sizes = array('Q')
+        self.mtimes_ns = array('q')
+        self.mode_ids = array('B')
+        self.format_ids = array('B')
+        self.modes: list[str] = []
+        self.formats: list[str] = []
+
+    def append(self, metadata: ImageMetadata):
+        self.widths.append(metadata.width)
+        self.heights.append(metadata.height)
+        self.byte_sizes.append(metadata.byte_size)
+        self.mtimes_ns.append(metadata.mtime_ns)
+        self.mode_ids.append(self._lookup_id(self.modes, metadata.mode))
+        self.format_ids.append(self._lookup_id(self.formats, metadata.format))
+
+    def _lookup_id(self, table: list[str], value: str) -> int:
+        if value not in table:
+            table.append(value)
+        return table.index(value)
+
+    def __len__(self) -> int:
+        return len(self.widths)
+
+    def __getitem__(self, index: int) -> ImageMetadata:
+        return ImageMetadata(
+            self.widths[index],
+            self.heights[index],
+            self.modes[self.mode_ids[index]],
+            self.formats[self.format_ids[index]],
+            self.byte_sizes[index],
+            self.mtimes_ns[index],
+        )
+
+    @property
+    def complete(self) -> bool:
+        """True when the dimensions of every image are known."""
+        return all(self.widths) and all(self.heights)
+
+    def pixel_counts(self) -> list[int]:
+        return [width * height for width, height in zip(self.widths, self.heights)]
+
+    # This dictates how it will look in the log file.
+    def __repr__(self):
+        return "'images:{0}, max_width:{1}, total_height:{2}'".format(
+            len(self), max(self.widths, default=0), sum(self.heights)
+        )
@@ -1,3 +1,6 @@
+from .image_metadata import ImageMetadataIndex
+
+
 class WorkDirectory:
     """Model for holding Working Directory Information"""
 
@@ -7,6 +10,8 @@ class WorkDirectory:
         self.postprocess_path: str = postprocess
         self.input_files: list = []
         self.output_files: list = []
+        # Header information of the input files, when the explorer probed them.
+        self.metadata: ImageMetadataIndex = None
 
     # This dictates how it will look in the log file.
     def __repr__(self):
@@ -1,20 +1,47 @@
-from .directory_explorer import DirectoryExplorer
-from .global_logger import GlobalLogger, logFunc
-from .global_tracker import GlobalTracker
-from .image_handler import ImageHandler
-from .image_manipulator import ImageManipulator
-from .postprocess_runner import PostProcessRunner
-from .settings_handler import SettingsHandler
-from .advanced_psd_merger import AdvancedPsdMerger
+import importlib
 
 __all__ = [
-    logFunc,
-    GlobalLogger,
-    DirectoryExplorer,
-    ImageHandler,
-    ImageManipulator,
-    SettingsHandler,
-    GlobalTracker,
-    PostProcessRunner,
-    AdvancedPsdMerger,
+    'logFunc',
+    'GlobalLogger',
+    'DirectoryExplorer',
+    'DirectoryStitcher',
+    'ImageHandler',
+    'ImageManipulator',
+    'SettingsHandler',
+    'GlobalTracker',
+    'PostProcessRunner',
+    'RowProfileCache',
+    'RollingStitcher',
+    'SourcePassthrough',
+    'SourceSlicer',
+    'WorkerPool',
+    'AdvancedPsdMerger',
 ]
+
+# Module of every service, relative to this package.
+SERVICE_MODULES = {
+    'logFunc': '.global_logger',
+    'GlobalLogger': '.global_logger',
+    'DirectoryExplorer': '.directory_explorer',
+    'DirectoryStitcher': '.directory_stitcher',
+    'ImageHandler': '.image_handler',
+    'ImageManipulator': '.image_manipulator',
+    'SettingsHandler': '.settings_handler',
+    'GlobalTracker': '.global_tracker',
+    'PostProcessRunner': '.postprocess_runner',
+    'RowProfileCache': '.profile_cache',
+    'RollingStitcher': '.rolling_stitcher',
+    'SourcePassthrough': '.source_passthrough',
+    'SourceSlicer': '.source_slicer',
+    'WorkerPool': '.worker_pool',
+    'AdvancedPsdMerger': '.advanced_psd_merger',
+}
+
+
+def __getattr__(name: str):
+    # Services are imported on first access, so importing one of them (like
+    # the logger) does not pull in every service and dependency.
+    if name in SERVICE_MODULES:
+        module = importlib.import_module(SERVICE_MODULES[name], __name__)
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
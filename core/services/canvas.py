@@ -0,0 +1,122 @@
+import os
+import tempfile
+from multiprocessing import shared_memory
+
+import numpy as np
+from PIL import Image as pil
+
+# PIL keeps RGB pixels padded to 4 bytes, canvases use the same layout so they
+# can be handed to PIL as RGBX images without a copy.
+CANVAS_CHANNELS = 4
+
+
+class ScratchFile:
+    """Canvas memory in a file of a scratch directory, paged in and out by the OS.
+
+    It is shared with worker processes by its path (name) just like a shared
+    memory block, see pixel_buffers.open_shared_image.
+    """
+
+    def __init__(self, directory: str = None):
+        fd, path = tempfile.mkstemp(
+            prefix='smartstitch_', suffix='.canvas', dir=directory
+        )
+        os.close(fd)
+        self.name = os.path.abspath(path)
+
+    def unlink(self):
+        try:
+            os.remove(self.name)
+        except FileNotFoundError:
+            pass
+
+
+def new_canvas(
+    width: int, height: int, shared: bool = False, scratch_directory: str = None
+) -> tuple:
+    """Allocates a black canvas of RGBX pixel rows.
+
+    Returns the canvas and, when shared, the named shared memory block holding
+    it, so worker processes can read its rows without a copy. When a
+    *scratch_directory* is given the canvas is a memory mapped ScratchFile in
+    it instead, which is always shared. The block or file is owned by the
+    caller who must unlink it once no worker needs it anymore.
+    """
+    shape = (height, width, CANVAS_CHANNELS)
+    if scratch_directory is not None:
+        scratch_file = ScratchFile(scratch_directory or None)
+        canvas = np.memmap(scratch_file.name, dtype=np.uint8, mode='w+', shape=shape)
+        return canvas, scratch_file
+    if not shared:
+        return np.zeros(shape, dtype=np.uint8), None
+    # Fresh shared memory reads as zeros, like np.zeros only touched pages count.
+    block = shared_memory.SharedMemory(create=True, size=max(1, width * height * 4))
+    return np.ndarray(shape, dtype=np.uint8, buffer=block.buf), block
+
+
+def paste_rows(canvas: np.ndarray, img: pil.Image, top: int):
+    """Copies an image into the canvas rows starting at top, converting its mode.
+
+    RGB and RGBA images share the padded pixel layout of the canvas, so PIL
+    copies them straight in (RGBA pages lose their alpha, like pasting them
+    into an RGB image). Grayscale pixels are spread over the colour channels.
+    """
+    width, height = img.size
+    if img.mode == 'L':
+        pixels = np.frombuffer(img.tobytes(), dtype=np.uint8)
+        canvas[top : top + height, :width, :3] = pixels.reshape(height, width, 1)
+        return
+    if img.mode not in ('RGB', 'RGBA'):
+        img = img.convert('RGB')
+    img.load()
+    # Pasting on the core image skips the RGBX conversion Image.paste would make.
+    rows_img = canvas_image(canvas[top : top + height])
+    rows_img.im.paste(img.im, (0, 0, width, height))
+
+
+def canvas_image(
+    canvas: np.ndarray, shared_block: shared_memory.SharedMemory = None, offset: int = 0
+) -> pil.Image:
+    """Wraps canvas rows in an RGBX PIL image sharing their memory.
+
+    The rows are kept on the image, along with the shared block holding them
+    and their byte offset in it, so canvas_rows can take views of them.
+    Convert to RGB before saving, most formats can not store RGBX.
+    """
+    height, width = canvas.shape[:2]
+    image = pil.frombuffer('RGBX', (width, height), canvas, 'raw', 'RGBX', 0, 1)
+    image.canvas = canvas
+    image.canvas_offset = offset
+    image.shared_block = shared_block
+    return image
+
+
+def canvas_rows(img: pil.Image, top: int, bottom: int) -> pil.Image:
+    """Gets the rows from top to bottom of an image.
+
+    Images made by canvas_image hand out a view sharing their memory, other
+    images a cropped copy.
+    """
+    canvas = getattr(img, 'canvas', None)
+    if canvas is None:
+        return img.crop((0, top, img.size[0], bottom))
+    return canvas_image(
+        canvas[top:bottom],
+        img.shared_block,
+        img.canvas_offset + top * canvas.strides[0],
+    )
+
+
+def is_file_backed(img: pil.Image) -> bool:
+    """True for images made by canvas_image on a ScratchFile canvas."""
+    return isinstance(getattr(img, 'canvas', None), np.memmap)
+
+
+def close_canvas_image(img: pil.Image):
+    """Closes an image, letting go of the canvas rows it holds.
+
+    A shared block it holds is not unlinked, its owner does that.
+    """
+    img.close()
+    img.canvas = None
+    img.shared_block = None
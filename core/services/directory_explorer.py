@@ -6,9 +6,20 @@ from ..models import WorkDirectory
 from ..utils.constants import OUTPUT_SUFFIX, POSTPROCESS_SUFFIX, SUPPORTED_IMG_TYPES
 from ..utils.errors import DirectoryException
 from .global_logger import logFunc
+from .image_probe import probe_images
 
 
 class DirectoryExplorer:
+    def __init__(self, probe_headers: bool = False, max_workers: int = None):
+        """Initialize DirectoryExplorer, optionally probing image headers.
+
+        When probe_headers is True the dimensions, mode, format, byte size and
+        modification time of every image are read from its header (in parallel,
+        without decoding) into the metadata of its work directory.
+        """
+        self.probe_headers = probe_headers
+        self.max_workers = max_workers
+
     def run(self, input, **kwargs):
         main_directory = self.get_main_directory(input, **kwargs)
         working_directories = self.explore_directories(main_directory)
@@ -42,6 +53,11 @@ class DirectoryExplorer:
                 dir_subprocess = os.path.join(main_directory.postprocess_path, rel_root)
                 directory = WorkDirectory(dir_root, dir_output, dir_subprocess)
                 directory.input_files = img_files
+                if self.probe_headers:
+                    directory.metadata = probe_images(
+                        [os.path.join(dir_root, file) for file in img_files],
+                        self.max_workers,
+                    )
                 work_directories.append(directory)
         if not (work_directories):
             raise DirectoryException('No valid work directories were found!')
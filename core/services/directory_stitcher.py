@@ -0,0 +1,276 @@
+import functools
+from typing import Callable
+
+from ..detectors import (
+    RollingSliceWalk,
+    VirtualCanvas,
+    detector_capabilities,
+    select_detector,
+)
+from ..models import WorkDirectory
+from ..utils.constants import (
+    DETECTOR_CAPABILITY,
+    RESAMPLE_QUALITY,
+    SLICE_PLANNER,
+    WIDTH_ENFORCEMENT,
+)
+from .global_logger import GlobalLogger, logFunc
+from .image_handler import ImageHandler
+from .image_manipulator import ImageManipulator
+from .profile_cache import RowProfileCache
+from .rolling_stitcher import RollingStitcher
+from .source_passthrough import SourcePassthrough
+from .source_slicer import SourceSlicer
+
+# Progress message of every stage reported by DirectoryStitcher.run.
+STAGE_MESSAGES = {
+    'load': 'Preparing & loading images Into memory',
+    'slice_sources': 'Slicing & saving images straight from the input files',
+    'rolling': 'Stitching & saving images in a rolling window',
+    'detect': 'Detecting & selecting valid slicing points',
+    'combine': 'Combining images into a single combined image',
+    'slice': 'Generating sliced output images in memory',
+    'save': 'Saving output images to storage (parallel)',
+}
+
+
+class DirectoryStitcher:
+    def __init__(
+        self,
+        img_handler: ImageHandler,
+        img_manipulator: ImageManipulator,
+        detection_type: str,
+        slice_planner=SLICE_PLANNER.GREEDY,
+        rolling_window: bool = False,
+        profile_cache_size: int = 0,
+        profile_cache_age: int = 0,
+    ):
+        """Stitches work directories along the fastest path their detector allows.
+
+        Images are loaded, combined and saved with img_handler and
+        img_manipulator, and detection runs on the executor of img_handler.
+        """
+        self.img_handler = img_handler
+        self.img_manipulator = img_manipulator
+        self.detector = select_detector(detection_type=detection_type)
+        self.slice_planner = slice_planner
+        capabilities = detector_capabilities(detection_type)
+        self.detect_on_sources = DETECTOR_CAPABILITY.VIRTUAL_CANVAS in capabilities
+        self.profile_bands = DETECTOR_CAPABILITY.ROW_BANDS in capabilities
+        self.source_slicer = None
+        if DETECTOR_CAPABILITY.HEIGHTS_ONLY in capabilities:
+            self.source_slicer = SourceSlicer(img_handler)
+        self.rolling_stitcher = None
+        if (
+            rolling_window
+            and DETECTOR_CAPABILITY.GREEDY_WALK in capabilities
+            and slice_planner not in ('optimal', SLICE_PLANNER.OPTIMAL)
+        ):
+            self.rolling_stitcher = RollingStitcher(img_handler)
+        self.profile_cache = None
+        if profile_cache_size > 0:
+            if DETECTOR_CAPABILITY.PROFILE_CACHE in capabilities:
+                self.profile_cache = RowProfileCache(
+                    max_size_mb=profile_cache_size, max_age_days=profile_cache_age
+                )
+            else:
+                GlobalLogger.log_warning(
+                    'the row profile cache is only used by the indexed detector',
+                    type(self).__name__,
+                )
+
+    @logFunc(inclass=True)
+    def run(
+        self,
+        workdirectory: WorkDirectory,
+        split_height: int = 5000,
+        sensitivity: int = 90,
+        ignorable_pixels: int = 0,
+        scan_step: int = 5,
+        enforce_type: WIDTH_ENFORCEMENT = WIDTH_ENFORCEMENT.NONE,
+        enforce_width: int = 720,
+        resample_quality: RESAMPLE_QUALITY = RESAMPLE_QUALITY.BEST,
+        img_format: str = '.png',
+        quality=100,
+        psd_first_layer_only: bool = False,
+        passthrough_sources: bool = False,
+        stage_func: Callable[[str], None] = None,
+    ) -> int:
+        """Stitches a work directory and saves its slices, returning their number.
+
+        Detectors slicing on heights alone build every slice straight from the
+        source images, greedy detectors may stitch in a rolling window, and any
+        other directory (or one these paths give up on) is loaded, combined,
+        detected and sliced in full. stage_func is called with the name of each
+        stage as it starts, one of the keys of STAGE_MESSAGES.
+        """
+        stage_func = stage_func or (lambda stage: None)
+        stage_func('load')
+        target_width = self.img_manipulator.target_width(
+            enforce_type, enforce_width, workdirectory.metadata, psd_first_layer_only
+        )
+        planned_sizes = self.img_manipulator.planned_sizes(
+            workdirectory.metadata,
+            len(workdirectory.input_files),
+            enforce_type,
+            target_width,
+            psd_first_layer_only,
+        )
+        passthrough = None
+        if passthrough_sources and planned_sizes:
+            passthrough = SourcePassthrough(workdirectory, planned_sizes, img_format)
+        write_kwargs = {
+            "psd_first_layer_only": psd_first_layer_only,
+            "target_width": target_width,
+            "resample_quality": resample_quality,
+            "img_format": img_format,
+            "quality": quality,
+            "passthrough": passthrough,
+        }
+        img_count = None
+        if self.source_slicer and planned_sizes:
+            # Slice locations only depend on the image heights, every slice is
+            # built from the images it covers.
+            stage_func('slice_sources')
+            img_count = self.source_slicer.run(
+                workdirectory,
+                planned_sizes,
+                self.detector.slice_locations(
+                    sum(img_height for _, img_height in planned_sizes), split_height
+                ),
+                **write_kwargs,
+            )
+        if img_count is None and self.rolling_stitcher and planned_sizes:
+            # Slices are saved as soon as they are found, the combined image is
+            # never built.
+            stage_func('rolling')
+            img_count = self.rolling_stitcher.run(
+                workdirectory,
+                planned_sizes,
+                split_height,
+                RollingSliceWalk(
+                    sum(img_height for _, img_height in planned_sizes),
+                    split_height,
+                    scan_step,
+                ),
+                functools.partial(
+                    self.detector.sliceable_rows,
+                    sensitivity=sensitivity,
+                    ignorable_pixels=ignorable_pixels,
+                ),
+                **write_kwargs,
+            )
+        if img_count is None:
+            detector_kwargs = {
+                "sensitivity": sensitivity,
+                "ignorable_pixels": ignorable_pixels,
+                "scan_step": scan_step,
+                "slice_planner": self.slice_planner,
+                "profile_cache": self.profile_cache,
+                "cache_key": None,
+                "executor": self.img_handler.executor,
+            }
+            if self.profile_cache:
+                detector_kwargs["cache_key"] = self.profile_cache.fingerprint(
+                    workdirectory,
+                    ignorable_pixels=ignorable_pixels,
+                    enforce_type=enforce_type,
+                    enforce_width=enforce_width,
+                    resample_quality=resample_quality,
+                    psd_first_layer_only=psd_first_layer_only,
+                )
+            img_count = self._stitch_combined(
+                workdirectory,
+                planned_sizes,
+                split_height,
+                detector_kwargs,
+                enforce_type,
+                enforce_width,
+                stage_func,
+                **write_kwargs,
+            )
+        return img_count
+
+    def _stitch_combined(
+        self,
+        workdirectory: WorkDirectory,
+        planned_sizes: list[tuple[int, int]] | None,
+        split_height: int,
+        detector_kwargs: dict[str, any],
+        enforce_type: WIDTH_ENFORCEMENT,
+        enforce_width: int,
+        stage_func: Callable[[str], None],
+        psd_first_layer_only: bool = False,
+        target_width: int = None,
+        resample_quality: RESAMPLE_QUALITY = RESAMPLE_QUALITY.BEST,
+        img_format: str = '.png',
+        quality=100,
+        passthrough: SourcePassthrough = None,
+    ) -> int:
+        """Stitches a work directory through a combined image of all its images."""
+        # Detectors able to read the loaded images do so, unless the combined
+        # image goes to a scratch file: then the images are not all kept in
+        # memory and detection reads the scratch file. Detectors profiling row
+        # bands in worker processes read a combined image in shared memory in
+        # place, the loaded images would be converted in this process.
+        detect_on_loaded = (
+            self.detect_on_sources
+            and not (self.profile_bands and self.img_manipulator.shares_canvas())
+            and not (
+                planned_sizes
+                and self.img_manipulator.exceeds_memory_limit(planned_sizes)
+            )
+        )
+        stream_combine = bool(planned_sizes) and not detect_on_loaded
+        if stream_combine:
+            # Images are pasted into the combined image as they load.
+            combined_img = self.img_manipulator.combine_stream(
+                self.img_handler.load_iter(
+                    workdirectory,
+                    psd_first_layer_only=psd_first_layer_only,
+                    target_width=target_width,
+                    resample_quality=resample_quality,
+                ),
+                planned_sizes,
+            )
+        else:
+            imgs = self.img_handler.load(
+                workdirectory,
+                psd_first_layer_only=psd_first_layer_only,
+                target_width=target_width,
+                resample_quality=resample_quality,
+            )
+            imgs = self.img_manipulator.resize(
+                imgs, enforce_type, enforce_width, resample_quality
+            )
+        if detect_on_loaded:
+            # Detector reads rows straight from the loaded images.
+            stage_func('detect')
+            slice_points = self.detector.run(
+                VirtualCanvas(imgs), split_height, **detector_kwargs
+            )
+        if not stream_combine:
+            stage_func('combine')
+            combined_img = self.img_manipulator.combine(imgs)
+        if not detect_on_loaded:
+            stage_func('detect')
+            slice_points = self.detector.run(
+                combined_img, split_height, **detector_kwargs
+            )
+        stage_func('slice')
+        source_files = None
+        # Only when the images were loaded at their planned sizes
+        if passthrough and combined_img.size[1] == sum(
+            img_height for _, img_height in planned_sizes
+        ):
+            source_files = passthrough.source_files(slice_points)
+        imgs = self.img_manipulator.slice(combined_img, slice_points)
+        stage_func('save')
+        self.img_handler.save_all(
+            workdirectory,
+            imgs,
+            img_format=img_format,
+            quality=quality,
+            source_files=source_files,
+        )
+        return len(imgs)
@@ -1,24 +1,60 @@
-import io
+import math
 import os
-from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from collections import deque
+from concurrent.futures import Executor, ThreadPoolExecutor, as_completed
 from multiprocessing import cpu_count
+from typing import Callable, Iterator
 
 from PIL import Image as pil
 from psd_tools import PSDImage
 
 from ..models import WorkDirectory
-from .global_logger import logFunc
-from ..utils.constants import PHOTOSHOP_FILE_TYPES
+from .canvas import close_canvas_image
+from .global_logger import GlobalLogger, logFunc
+from .image_manipulator import fit_width
+from .pixel_buffers import (
+    export_image,
+    import_image,
+    open_shared_image,
+    share_images,
+)
+from .source_passthrough import copy_source
+from .worker_pool import borrow_executor, runs_in_process, submit_batches
+from ..utils.constants import PHOTOSHOP_FILE_TYPES, RESAMPLE_QUALITY
 
 
 # Module-level functions for multiprocessing (must be picklable)
-def _load_image_worker(args: tuple) -> bytes:
-    """Worker function to load a single image and return as bytes."""
-    img_path, psd_first_layer_only = args
+def _load_image_worker(args: tuple) -> tuple:
+    """Worker function to load a single image and hand over its raw pixels."""
+    img_path, psd_first_layer_only, in_process, target_width, resample_quality = args
+    image = _open_image(img_path, psd_first_layer_only, target_width, resample_quality)
+    return export_image(image, in_process)
+
+
+def _open_image(
+    img_path: str,
+    psd_first_layer_only: bool,
+    target_width: int,
+    resample_quality: RESAMPLE_QUALITY,
+) -> pil.Image:
+    """Opens a single image as RGB(A), with the width enforced when given."""
     ext = os.path.splitext(img_path)[1].lower()
     
+    source_size = None
     if ext not in PHOTOSHOP_FILE_TYPES:
         image = pil.open(img_path)
+        if (
+            image.format == 'JPEG'
+            and resample_quality != RESAMPLE_QUALITY.BEST
+            and target_width
+            and target_width * 2 <= image.width
+            and int(image.height / image.width * target_width) > 0
+        ):
+            # Let the JPEG decoder scale down by 1/2, 1/4 or 1/8 while decoding,
+            # the exact resize below keeps the aspect ratio of the full image.
+            source_size = image.size
+            draft_height = math.ceil(image.height * target_width / image.width)
+            image.draft(None, (target_width, draft_height))
     else:
         psd = PSDImage.open(img_path)
         if psd_first_layer_only and len(psd) > 0:
@@ -26,51 +62,86 @@ def _load_image_worker(args: tuple) -> bytes:
         else:
             image = psd.topil()
     
-    # Convert to RGB if necessary and serialize to bytes
+    # Convert to RGB if necessary, enforce the width and hand over the pixels
     if image.mode not in ('RGB', 'RGBA'):
         image = image.convert('RGB')
-    
-    buffer = io.BytesIO()
-    image.save(buffer, format='PNG')
-    return buffer.getvalue()
+    if target_width:
+        image = fit_width(image, target_width, source_size, resample_quality)
+    return image
 
 
 def _save_image_worker(args: tuple) -> str:
-    """Worker function to save a single image from bytes."""
-    img_bytes, full_path, img_format, quality = args
+    """Worker function to save a single image from shared memory."""
+    img_ref, full_path, img_format, quality = args
     
-    image = pil.open(io.BytesIO(img_bytes))
+    with open_shared_image(img_ref) as image:
+        # Slices of a combined canvas are RGBX, which most formats can not store
+        if image.mode == 'RGBX':
+            image = image.convert('RGB')
+        _write_image(image, full_path, img_format, quality)
     
+    return os.path.basename(full_path)
+
+
+def _write_image(image: pil.Image, full_path: str, img_format: str, quality):
+    """Writes a single image to full_path in the given format."""
     if img_format in PHOTOSHOP_FILE_TYPES:
         psd_obj = PSDImage.frompil(image)
         psd_obj.save(full_path)
     else:
         image.save(full_path, quality=quality)
-    image.close()
-    
-    return os.path.basename(full_path)
 
 
 class ImageHandler:
-    def __init__(self, max_workers: int = None):
+    def __init__(self, max_workers: int = None, executor: Executor = None):
         """Initialize ImageHandler with optional max_workers for multiprocessing.
         
-        If max_workers is None, uses CPU count.
+        If max_workers is None, uses CPU count. When a shared executor (like a
+        WorkerPool) is given it is used instead of a pool per call.
         """
         self.max_workers = max_workers or cpu_count()
+        self.executor = executor
 
     @logFunc(inclass=True)
     def load(
         self,
         workdirectory: WorkDirectory,
         psd_first_layer_only: bool = False,
+        target_width: int = None,
+        resample_quality: RESAMPLE_QUALITY = RESAMPLE_QUALITY.BEST,
     ) -> list[pil.Image]:
         """Loads all image files in a given work into a list of PIL image objects.
 
         When *psd_first_layer_only* is True and the input file is a PSD/PSB,
         only the first layer (usually the background) is rendered instead of the
         full composited image.
+
+        When a *target_width* is given, every image is resized to it (like
+        ImageManipulator.resize) in the same worker that decodes it.
+        *resample_quality* picks how they are resized, below best JPEGs at
+        least twice as wide are decoded at a reduced scale first.
         
+        Uses multiprocessing for true parallel loading across CPU cores.
+        """
+        img_objs = [None] * len(workdirectory.input_files)
+        for idx, img in self.load_iter(
+            workdirectory, psd_first_layer_only, target_width, resample_quality
+        ):
+            img_objs[idx] = img
+        return img_objs
+
+    def load_iter(
+        self,
+        workdirectory: WorkDirectory,
+        psd_first_layer_only: bool = False,
+        target_width: int = None,
+        resample_quality: RESAMPLE_QUALITY = RESAMPLE_QUALITY.BEST,
+    ) -> Iterator[tuple[int, pil.Image]]:
+        """Loads all image files in a given work, yielding (index, image) pairs.
+
+        Images are yielded as soon as they are loaded, not in order, see load
+        for the parameters.
+
         Uses multiprocessing for true parallel loading across CPU cores.
         """
         input_files = workdirectory.input_files
@@ -79,26 +150,82 @@ class ImageHandler:
             for imgFile in input_files
         ]
         
-        # Prepare arguments for worker
-        args_list = [(path, psd_first_layer_only) for path in img_paths]
-        
-        # Use ProcessPoolExecutor for true parallelism
-        img_bytes_list = [None] * len(img_paths)
-        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
-            future_to_index = {
-                executor.submit(_load_image_worker, args): idx
-                for idx, args in enumerate(args_list)
-            }
-            for future in as_completed(future_to_index):
-                idx = future_to_index[future]
-                img_bytes_list[idx] = future.result()
-        
-        # Convert bytes back to PIL Images in main process
-        img_objs = [
-            pil.open(io.BytesIO(img_bytes)) for img_bytes in img_bytes_list
+        # Use worker processes for true parallelism, workers hand the decoded
+        # pixels over through shared memory instead of re-encoding them
+        with borrow_executor(self.executor, self.max_workers) as executor:
+            in_process = runs_in_process(executor)
+            args_list = [
+                (
+                    path,
+                    psd_first_layer_only,
+                    in_process,
+                    target_width,
+                    resample_quality,
+                )
+                for path in img_paths
+            ]
+            # Small images are loaded in batches of about the same pixel count,
+            # or file size when the headers were not probed
+            metadata = workdirectory.metadata
+            if (
+                metadata is not None
+                and len(metadata) == len(img_paths)
+                and metadata.complete
+            ):
+                img_costs = metadata.pixel_counts()
+            else:
+                img_costs = [os.path.getsize(path) for path in img_paths]
+            for idx, result in submit_batches(
+                executor, _load_image_worker, args_list, img_costs, self.max_workers
+            ):
+                yield idx, import_image(result)
+
+    def load_ordered(
+        self,
+        workdirectory: WorkDirectory,
+        psd_first_layer_only: bool = False,
+        target_width: int = None,
+        resample_quality: RESAMPLE_QUALITY = RESAMPLE_QUALITY.BEST,
+        prefetch: int = None,
+    ) -> Iterator[pil.Image]:
+        """Loads all image files in a given work, yielding the images in order.
+
+        Only *prefetch* images (twice the number of workers by default) are
+        loaded ahead of the one yielded last, so memory use does not grow with
+        the number of files. See load for the other parameters.
+        """
+        img_paths = [
+            os.path.join(workdirectory.input_path, imgFile)
+            for imgFile in workdirectory.input_files
         ]
-        
-        return img_objs
+        with borrow_executor(self.executor, self.max_workers) as executor:
+            in_process = runs_in_process(executor)
+            max_workers = getattr(executor, 'max_workers', None) or self.max_workers
+            prefetch = prefetch or 2 * max_workers
+            futures = deque()
+            try:
+                for path in img_paths:
+                    futures.append(
+                        executor.submit(
+                            _load_image_worker,
+                            (
+                                path,
+                                psd_first_layer_only,
+                                in_process,
+                                target_width,
+                                resample_quality,
+                            ),
+                        )
+                    )
+                    if len(futures) > prefetch:
+                        yield import_image(futures.popleft().result())
+                while futures:
+                    yield import_image(futures.popleft().result())
+            finally:
+                # Images loaded ahead of a consumer that stopped early are dropped.
+                for future in futures:
+                    if not future.cancel():
+                        import_image(future.result()).close()
 
     @logFunc(inclass=True)
     def save(
@@ -113,6 +240,8 @@ class ImageHandler:
             os.makedirs(workdirectory.output_path)
         img_file_name = str(f'{img_iteration:02}') + img_format
         full_path = os.path.join(workdirectory.output_path, img_file_name)
+        if img_obj.mode == 'RGBX':
+            img_obj = img_obj.convert('RGB')
         
         if img_format in PHOTOSHOP_FILE_TYPES:
             psd_obj = PSDImage.frompil(img_obj)
@@ -130,8 +259,13 @@ class ImageHandler:
         img_objs: list[pil.Image],
         img_format: str = '.png',
         quality=100,
+        source_files: list[str] = None,
     ) -> WorkDirectory:
-        """Save all images using multiprocessing for true parallel writes."""
+        """Save all images using multiprocessing for true parallel writes.
+
+        Images with a file in *source_files* (see SourcePassthrough) are
+        copied from it instead of being encoded.
+        """
         if not os.path.exists(workdirectory.output_path):
             os.makedirs(workdirectory.output_path)
         
@@ -142,26 +276,81 @@ class ImageHandler:
         full_paths = [
             os.path.join(workdirectory.output_path, fn) for fn in file_names
         ]
+        source_files = source_files or [None] * len(img_objs)
+        passed_through = 0
+        for source_file, full_path in zip(source_files, full_paths):
+            if source_file:
+                copy_source(source_file, full_path)
+                passed_through += 1
+        if passed_through:
+            GlobalLogger.log_debug(
+                f'{passed_through} of {len(img_objs)} slices passed through '
+                'from their source files',
+                type(self).__name__,
+            )
+        encoded = [i for i in range(len(img_objs)) if not source_files[i]]
         
-        # Serialize images to bytes for multiprocessing
-        img_bytes_list = []
-        for img in img_objs:
-            buffer = io.BytesIO()
-            img.save(buffer, format='PNG')
-            img_bytes_list.append(buffer.getvalue())
-            img.close()
-        
-        # Prepare arguments for workers
-        args_list = [
-            (img_bytes, full_path, img_format, quality)
-            for img_bytes, full_path in zip(img_bytes_list, full_paths)
-        ]
-        
-        # Use ProcessPoolExecutor for true parallelism
-        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
-            futures = [executor.submit(_save_image_worker, args) for args in args_list]
-            for future in as_completed(futures):
-                future.result()  # Raise any exceptions
+        # Use worker processes for true parallelism
+        with borrow_executor(self.executor, self.max_workers) as executor:
+            # Share the raw slice pixels, workers encode them straight to their files
+            in_process = runs_in_process(executor)
+            block, img_refs = share_images([img_objs[i] for i in encoded], in_process)
+            # Slices of a shared canvas are read in place, it goes once all are saved
+            canvas_blocks = {
+                img.shared_block
+                for img in img_objs
+                if getattr(img, 'canvas', None) is not None and img.shared_block
+            }
+            if not in_process:
+                for img in img_objs:
+                    close_canvas_image(img)
+            
+            # Prepare arguments for workers
+            args_list = [
+                (img_ref, full_paths[i], img_format, quality)
+                for img_ref, i in zip(img_refs, encoded)
+            ]
+            
+            try:
+                futures = [
+                    executor.submit(_save_image_worker, args) for args in args_list
+                ]
+                for future in as_completed(futures):
+                    future.result()  # Raise any exceptions
+            finally:
+                if in_process:
+                    for img in img_objs:
+                        close_canvas_image(img)
+                if block is not None:
+                    block.close()
+                    block.unlink()
+                for canvas_block in canvas_blocks:
+                    canvas_block.unlink()
         
         workdirectory.output_files.extend(file_names)
         return workdirectory
+
+    def sample_loader(
+        self,
+        workdirectory: WorkDirectory,
+        sample_size: int = 8,
+        psd_first_layer_only: bool = False,
+    ) -> Callable[[Executor], None]:
+        """Gets a task loading the first few images of a work directory.
+
+        The task takes the executor to load with, it is used to time executor
+        backends against each other with WorkerPool.autotune.
+        """
+        sample = WorkDirectory(
+            workdirectory.input_path,
+            workdirectory.output_path,
+            workdirectory.postprocess_path,
+        )
+        sample.input_files = workdirectory.input_files[:sample_size]
+
+        def load_sample(executor: Executor):
+            sample_handler = ImageHandler(executor=executor)
+            for img in sample_handler.load(sample, psd_first_layer_only):
+                img.close()
+
+        return load_sample
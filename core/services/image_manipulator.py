@@ -1,40 +1,146 @@
-import io
-from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures import Executor, ThreadPoolExecutor
+from itertools import accumulate
 from multiprocessing import cpu_count
+from typing import Iterable
 
 from PIL import Image as pil
 
-from ..utils.constants import WIDTH_ENFORCEMENT
-from .global_logger import logFunc
+from ..models import ImageMetadataIndex
+from ..utils.constants import RESAMPLE_QUALITY, WIDTH_ENFORCEMENT
+from .canvas import (
+    CANVAS_CHANNELS,
+    canvas_image,
+    canvas_rows,
+    close_canvas_image,
+    new_canvas,
+    paste_rows,
+)
+from .global_logger import GlobalLogger, logFunc
+from .pixel_buffers import (
+    SHARED_MEMORY_HANDOFF,
+    export_image,
+    import_image,
+    open_shared_image,
+    share_images,
+)
+from .worker_pool import borrow_executor, runs_in_process, submit_batches
+
+
+def fit_width(
+    img: pil.Image,
+    new_img_width: int,
+    source_size: tuple[int, int] = None,
+    resample_quality: RESAMPLE_QUALITY = RESAMPLE_QUALITY.BEST,
+) -> pil.Image:
+    """Resizes an image to a new width, keeping its aspect ratio.
+
+    The ratio is taken from source_size when given, for images that were
+    already decoded at a reduced scale. Images already at that width, or that
+    would end up 0px tall, are returned as they are. Faster resample qualities
+    first shrink the image by an integer factor with a cheap box average.
+    """
+    source_width, source_height = source_size or img.size
+    if source_width == new_img_width:
+        return img
+    img_ratio = float(source_height / source_width)
+    new_img_height = int(img_ratio * new_img_width)
+    if new_img_height <= 0 or img.size == (new_img_width, new_img_height):
+        return img
+    new_img_size = (new_img_width, new_img_height)
+    if resample_quality == RESAMPLE_QUALITY.FAST:
+        factor = min(img.size[0] // new_img_width, img.size[1] // new_img_height)
+        if factor >= 2:
+            img = img.reduce(factor)
+        return img.resize(new_img_size, pil.BILINEAR)
+    if resample_quality == RESAMPLE_QUALITY.BALANCED:
+        return img.resize(new_img_size, pil.LANCZOS, reducing_gap=2.0)
+    return img.resize(new_img_size, pil.LANCZOS)
 
 
 # Module-level function for multiprocessing (must be picklable)
-def _resize_image_worker(args: tuple) -> bytes:
-    """Worker function to resize a single image and return as bytes."""
-    img_bytes, new_img_width = args
-    
-    img = pil.open(io.BytesIO(img_bytes))
-    
-    if img.size[0] != new_img_width:
-        img_ratio = float(img.size[1] / img.size[0])
-        new_img_height = int(img_ratio * new_img_width)
-        if new_img_height > 0:
-            img = img.resize((new_img_width, new_img_height), pil.LANCZOS)
+def _resize_image_worker(args: tuple) -> tuple:
+    """Worker function to resize a single image and hand over its raw pixels."""
+    img_ref, new_img_width, resample_quality, in_process = args
     
-    # Serialize back to bytes
-    buffer = io.BytesIO()
-    img.save(buffer, format='PNG')
-    img.close()
-    return buffer.getvalue()
+    with open_shared_image(img_ref) as img:
+        resized_img = fit_width(img, new_img_width, None, resample_quality)
+        return export_image(resized_img, in_process)
 
 
 class ImageManipulator:
-    def __init__(self, max_workers: int = None):
+    def __init__(
+        self,
+        max_workers: int = None,
+        executor: Executor = None,
+        canvas_memory_limit: int = 0,
+        scratch_directory: str = None,
+    ):
         """Initialize ImageManipulator with optional max_workers for multiprocessing.
         
-        If max_workers is None, uses CPU count.
+        If max_workers is None, uses CPU count. When a shared executor (like a
+        WorkerPool) is given it is used instead of a pool per call. Combined
+        images bigger than canvas_memory_limit megabytes (0 for no limit) are
+        kept in a memory mapped file of the scratch_directory (the system temp
+        directory when not set) instead of in memory.
         """
         self.max_workers = max_workers or cpu_count()
+        self.executor = executor
+        self.canvas_memory_limit = canvas_memory_limit
+        self.scratch_directory = scratch_directory
+
+    def target_width(
+        self,
+        enforce_setting: WIDTH_ENFORCEMENT,
+        custom_width: int = 720,
+        metadata: ImageMetadataIndex = None,
+        psd_first_layer_only: bool = False,
+    ) -> int | None:
+        """Gets the width resize will enforce, before any image is decoded.
+
+        Automatic enforcement needs the probed header widths, it is unknown
+        (None) without them or when only the first layer of Photoshop files is
+        rendered, since that layer can be smaller than the file.
+        """
+        if enforce_setting == WIDTH_ENFORCEMENT.MANUAL:
+            return custom_width
+        if (
+            enforce_setting == WIDTH_ENFORCEMENT.AUTOMATIC
+            and metadata is not None
+            and metadata.complete
+            and not (psd_first_layer_only and {'PSD', 'PSB'} & set(metadata.formats))
+        ):
+            return min(metadata.widths)
+        return None
+
+    def planned_sizes(
+        self,
+        metadata: ImageMetadataIndex,
+        img_count: int,
+        enforce_setting: WIDTH_ENFORCEMENT,
+        target_width: int = None,
+        psd_first_layer_only: bool = False,
+    ) -> list[tuple[int, int]] | None:
+        """Gets the size of every image once loaded and resized, from the probed headers.
+
+        None when the sizes can not be known before decoding: headers are
+        missing, the width to enforce is unknown or only the first layer of
+        Photoshop files is rendered.
+        """
+        if metadata is None or len(metadata) != img_count or not metadata.complete:
+            return None
+        if psd_first_layer_only and {'PSD', 'PSB'} & set(metadata.formats):
+            return None
+        if enforce_setting != WIDTH_ENFORCEMENT.NONE and not target_width:
+            return None
+        img_sizes = []
+        for img_width, img_height in zip(metadata.widths, metadata.heights):
+            # Same arithmetic as fit_width
+            if target_width and img_width != target_width:
+                new_img_height = int(float(img_height / img_width) * target_width)
+                if new_img_height > 0:
+                    img_width, img_height = target_width, new_img_height
+            img_sizes.append((img_width, img_height))
+        return img_sizes
 
     @logFunc(inclass=True)
     def resize(
@@ -42,6 +148,7 @@ class ImageManipulator:
         img_objs: list[pil.Image],
         enforce_setting: WIDTH_ENFORCEMENT,
         custom_width: int = 720,
+        resample_quality: RESAMPLE_QUALITY = RESAMPLE_QUALITY.BEST,
     ) -> list[pil.Image]:
         """Resizes all given images according to the set enforcement setting.
         
@@ -58,61 +165,160 @@ class ImageManipulator:
         elif enforce_setting == WIDTH_ENFORCEMENT.MANUAL:
             new_img_width = custom_width
         
-        # Serialize images to bytes for multiprocessing
-        img_bytes_list = []
-        for img in img_objs:
-            buffer = io.BytesIO()
-            img.save(buffer, format='PNG')
-            img_bytes_list.append(buffer.getvalue())
-            img.close()
-        
-        # Prepare arguments for workers
-        args_list = [(img_bytes, new_img_width) for img_bytes in img_bytes_list]
+        # Nothing to do when load already enforced the width
+        if all(img.size[0] == new_img_width for img in img_objs):
+            return img_objs
         
-        # Use ProcessPoolExecutor for true parallelism
-        resized_bytes = [None] * len(img_objs)
-        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
-            future_to_index = {
-                executor.submit(_resize_image_worker, args): idx
-                for idx, args in enumerate(args_list)
-            }
-            for future in as_completed(future_to_index):
-                idx = future_to_index[future]
-                resized_bytes[idx] = future.result()
+        # Use worker processes for true parallelism, images are handed over to
+        # and back from the workers as raw pixels
+        resized_imgs = [None] * len(img_objs)
+        with borrow_executor(self.executor, self.max_workers) as executor:
+            in_process = runs_in_process(executor)
+            block, img_refs = share_images(img_objs, in_process)
+            try:
+                args_list = [
+                    (img_ref, new_img_width, resample_quality, in_process)
+                    for img_ref in img_refs
+                ]
+                img_costs = [img.size[0] * img.size[1] for img in img_objs]
+                for idx, result in submit_batches(
+                    executor,
+                    _resize_image_worker,
+                    args_list,
+                    img_costs,
+                    self.max_workers,
+                ):
+                    resized_imgs[idx] = import_image(result)
+            finally:
+                if block is not None:
+                    block.close()
+                    block.unlink()
         
-        # Convert bytes back to PIL Images
-        resized_imgs = [
-            pil.open(io.BytesIO(img_bytes)) for img_bytes in resized_bytes
-        ]
+        # Images that did not need resizing are handed back as they are
+        for img, resized_img in zip(img_objs, resized_imgs):
+            if img is not resized_img:
+                img.close()
         
         return resized_imgs
 
+    def exceeds_memory_limit(self, img_sizes: list[tuple[int, int]]) -> bool:
+        """True when images of these sizes combine over the canvas memory limit."""
+        widths, heights = zip(*img_sizes)
+        canvas_size = max(widths) * sum(heights) * CANVAS_CHANNELS
+        return bool(self.canvas_memory_limit) and (
+            canvas_size > self.canvas_memory_limit * 2**20
+        )
+
+    def shares_canvas(self) -> bool:
+        """True when combined images go to shared memory for worker processes.
+
+        Only canvases within the canvas memory limit, the others are kept in a
+        scratch file.
+        """
+        return (
+            SHARED_MEMORY_HANDOFF
+            and self.executor is not None
+            and not runs_in_process(self.executor)
+        )
+
+    def _new_canvas(self, width: int, height: int) -> tuple:
+        """Allocates a canvas for combine.
+
+        It is put in a scratch file when over the canvas memory limit, or else in
+        shared memory when a shared executor runs workers in other processes.
+        ImageHandler.save_all unlinks either once the slices are saved.
+        """
+        if self.exceeds_memory_limit([(width, height)]):
+            GlobalLogger.log_debug(
+                f'canvas of {width}x{height} is kept in a scratch file',
+                type(self).__name__,
+            )
+            scratch_directory = self.scratch_directory or ''
+            return new_canvas(width, height, scratch_directory=scratch_directory)
+        return new_canvas(width, height, shared=self.shares_canvas())
+
     @logFunc(inclass=True)
     def combine(self, img_objs: list[pil.Image]) -> pil.Image:
-        """Combines given image objs to a single vertically stacked single image obj."""
+        """Combines given image objs to a single vertically stacked single image obj.
+
+        Images are copied into their rows of one preallocated canvas by several
+        threads. The combined image is an RGBX image sharing the canvas memory.
+        """
         widths, heights = zip(*(img.size for img in img_objs))
         combined_img_width = max(widths)
         combined_img_height = sum(heights)
-        combined_img = pil.new('RGB', (combined_img_width, combined_img_height))
-        combine_offset = 0
-        for img in img_objs:
-            combined_img.paste(img, (0, combine_offset))
-            combine_offset += img.size[1]
+        canvas, block = self._new_canvas(combined_img_width, combined_img_height)
+        combine_offsets = [0, *accumulate(heights)][:-1]
+
+        def paste_img(img: pil.Image, combine_offset: int):
+            paste_rows(canvas, img, combine_offset)
             img.close()
-        return combined_img
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            list(executor.map(paste_img, img_objs, combine_offsets))
+        return canvas_image(canvas, block)
+
+    @logFunc(inclass=True)
+    def combine_stream(
+        self,
+        loaded_imgs: Iterable[tuple[int, pil.Image]],
+        img_sizes: list[tuple[int, int]],
+    ) -> pil.Image:
+        """Combines images into a canvas sized from img_sizes while they are loaded.
+
+        loaded_imgs yields (index, image) pairs in any order, like
+        ImageHandler.load_iter. Every image is pasted and closed as soon as it
+        arrives, so loaded images never pile up next to the canvas. Should an
+        image not have its planned size, all of them are combined like combine.
+        """
+        widths, heights = zip(*img_sizes)
+        canvas, block = self._new_canvas(max(widths), sum(heights))
+        combine_offsets = [0, *accumulate(heights)][:-1]
+        img_objs = [None] * len(img_sizes)
+        pasted_idxs = []
+        mismatched = False
+        for idx, img in loaded_imgs:
+            mismatched = mismatched or img.size != img_sizes[idx]
+            if mismatched:
+                img_objs[idx] = img
+                continue
+            paste_rows(canvas, img, combine_offsets[idx])
+            img.close()
+            pasted_idxs.append(idx)
+        if not mismatched:
+            return canvas_image(canvas, block)
+
+        GlobalLogger.log_warning(
+            'loaded images differ from their probed sizes, combining them again',
+            type(self).__name__,
+        )
+        combined_img = canvas_image(canvas, block)
+        del canvas
+        for idx in pasted_idxs:
+            img_width, img_height = img_sizes[idx]
+            top = combine_offsets[idx]
+            img_objs[idx] = combined_img.crop(
+                (0, top, img_width, top + img_height)
+            ).convert('RGB')
+        close_canvas_image(combined_img)
+        if block is not None:
+            block.unlink()
+        return self.combine(img_objs)
 
     @logFunc(inclass=True)
     def slice(
         self, combined_img: pil.Image, slice_locations: list[int]
     ) -> list[pil.Image]:
-        """Combines given combined img to into multiple img slices given the slice locations."""
-        max_width = combined_img.size[0]
+        """Combines given combined img to into multiple img slices given the slice locations.
+
+        Slices of a combined image made by combine are views of its rows, not
+        copies, they keep its memory alive until the last of them is closed.
+        """
         img_objs = []
         for index in range(1, len(slice_locations)):
             upper_limit = slice_locations[index - 1]
             lower_limit = slice_locations[index]
-            slice_boundaries = (0, upper_limit, max_width, lower_limit)
-            img_slice = combined_img.crop(slice_boundaries)
+            img_slice = canvas_rows(combined_img, upper_limit, lower_limit)
             img_objs.append(img_slice)
-        combined_img.close()
+        close_canvas_image(combined_img)
         return img_objs
@@ -0,0 +1,61 @@
+import os
+import struct
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import cpu_count
+
+from PIL import Image as pil
+
+from ..models import ImageMetadata, ImageMetadataIndex
+from ..utils.constants import PHOTOSHOP_FILE_TYPES
+from .global_logger import GlobalLogger
+
+# Signature, version, reserved bytes, channels, height, width, depth, color mode.
+PSD_HEADER = struct.Struct('>4sH6sHIIHH')
+PSD_COLOR_MODES = {1: 'L', 3: 'RGB', 4: 'CMYK'}
+
+
+def probe_psd_header(img_path: str) -> tuple[int, int, str, str]:
+    """Reads the width, height, mode and format from a PSD/PSB file header."""
+    with open(img_path, 'rb') as file:
+        header = file.read(PSD_HEADER.size)
+    if len(header) < PSD_HEADER.size:
+        raise ValueError('Truncated Photoshop file header')
+    signature, version, _, channels, height, width, _, color_mode = PSD_HEADER.unpack(
+        header
+    )
+    if signature != b'8BPS' or version not in (1, 2):
+        raise ValueError('Not a Photoshop file')
+    mode = PSD_COLOR_MODES.get(color_mode, '')
+    if mode == 'RGB' and channels > 3:
+        mode = 'RGBA'
+    return width, height, mode, 'PSD' if version == 1 else 'PSB'
+
+
+def probe_image(img_path: str) -> ImageMetadata:
+    """Reads the header information of an image file without decoding it."""
+    stat = os.stat(img_path)
+    try:
+        if os.path.splitext(img_path)[1].lower() in PHOTOSHOP_FILE_TYPES:
+            width, height, mode, img_format = probe_psd_header(img_path)
+        else:
+            with pil.open(img_path) as image:
+                width, height = image.size
+                mode, img_format = image.mode, image.format
+    except Exception as error:
+        GlobalLogger.log_warning(
+            f'unreadable header {img_path}: {error}', 'probe_image'
+        )
+        width, height, mode, img_format = 0, 0, '', ''
+    return ImageMetadata(
+        width, height, mode, img_format, stat.st_size, stat.st_mtime_ns
+    )
+
+
+def probe_images(img_paths: list[str], max_workers: int = None) -> ImageMetadataIndex:
+    """Probes the headers of image files in parallel, in the order given."""
+    metadata = ImageMetadataIndex()
+    # Header reads mostly wait on storage, so threads are enough.
+    with ThreadPoolExecutor(max_workers=max_workers or cpu_count()) as executor:
+        for img_metadata in executor.map(probe_image, img_paths):
+            metadata.append(img_metadata)
+    return metadata
@@ -0,0 +1,138 @@
+import os
+from contextlib import contextmanager
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+from PIL import Image as pil
+
+# Named shared memory on Windows is freed along with its last open handle, so a
+# block created by a worker can not outlive it there and raw bytes are sent.
+SHARED_MEMORY_HANDOFF = os.name != 'nt'
+
+
+def prepare_shared_memory():
+    """Starts the resource tracker before any worker process is created.
+
+    Workers then share the main process tracker, so blocks handed over between
+    processes are only tracked once and unlinking them never double counts.
+    """
+    if SHARED_MEMORY_HANDOFF:
+        resource_tracker.ensure_running()
+
+
+def export_image(image: pil.Image, in_process: bool = False) -> tuple:
+    """Hands the raw pixels of an image over to the main process.
+
+    Returns (mode, size, shared block name, raw bytes), only one of the last two
+    is set. Used by worker processes in place of encoding to an image format.
+    Workers running in the main process (in_process) hand the image itself.
+    """
+    if in_process:
+        image.load()
+        return (image.mode, image.size, None, image)
+    data = image.tobytes()
+    if not SHARED_MEMORY_HANDOFF or not data:
+        return (image.mode, image.size, None, data)
+    block = shared_memory.SharedMemory(create=True, size=len(data))
+    block.buf[: len(data)] = data
+    block.close()
+    return (image.mode, image.size, block.name, None)
+
+
+def import_image(payload: tuple) -> pil.Image:
+    """Wraps raw pixels handed over by export_image in a PIL image.
+
+    Modes PIL can map in place (like RGBA) wrap the shared block without a copy
+    and keep it alive for as long as the image, other modes are unpacked once.
+    """
+    mode, size, block_name, data = payload
+    if isinstance(data, pil.Image):
+        return data
+    if block_name is None:
+        return pil.frombuffer(mode, size, data, 'raw', mode, 0, 1)
+    block = shared_memory.SharedMemory(name=block_name)
+    # Only removes the name, the pixels stay mapped while this process uses them.
+    block.unlink()
+    image = pil.frombuffer(mode, size, block.buf, 'raw', mode, 0, 1)
+    if image.readonly:
+        image.shared_block = block
+    else:
+        block.close()
+    return image
+
+
+def raw_size(image: pil.Image) -> int:
+    """Number of bytes image.tobytes() returns for an image."""
+    return len(pil.new(image.mode, (image.width, 1)).tobytes()) * image.height
+
+
+def share_images(images: list[pil.Image], in_process: bool = False) -> tuple:
+    """Copies the raw pixels of images back to back into one shared block.
+
+    Returns the block, owned by the caller who must close and unlink it, and a
+    reference per image that worker processes can pass to open_shared_image.
+    Workers running in the main process (in_process) get the images themselves
+    and no block is created. Rows of a canvas already in shared memory or in a
+    scratch file (see canvas_image) are referenced in place, no block is
+    created when all are.
+    """
+    if in_process:
+        return None, list(images)
+    refs = [None] * len(images)
+    copied = []
+    for idx, image in enumerate(images):
+        canvas_block = getattr(image, 'shared_block', None)
+        if canvas_block is not None and getattr(image, 'canvas', None) is not None:
+            size = raw_size(image)
+            refs[idx] = (
+                canvas_block.name,
+                image.canvas_offset,
+                size,
+                image.mode,
+                image.size,
+            )
+        else:
+            copied.append(idx)
+    if not copied:
+        return None, refs
+    sizes = [raw_size(images[idx]) for idx in copied]
+    block = shared_memory.SharedMemory(create=True, size=max(1, sum(sizes)))
+    offset = 0
+    for idx, size in zip(copied, sizes):
+        image = images[idx]
+        block.buf[offset : offset + size] = image.tobytes()
+        refs[idx] = (block.name, offset, size, image.mode, image.size)
+        offset += size
+    return block, refs
+
+
+@contextmanager
+def open_shared_image(ref: tuple):
+    """Wraps an image shared by share_images without copying where possible."""
+    if isinstance(ref, pil.Image):
+        yield ref
+        return
+    block_name, offset, length, mode, size = ref
+    if os.path.isabs(block_name):
+        # Rows of a canvas kept in a scratch file are mapped from the file.
+        view = np.memmap(
+            block_name, dtype=np.uint8, mode='r', offset=offset, shape=(length,)
+        )
+        image = pil.frombuffer(mode, size, view, 'raw', mode, 0, 1)
+        try:
+            yield image
+        finally:
+            image.close()
+            del image, view
+        return
+    block = shared_memory.SharedMemory(name=block_name)
+    view = block.buf[offset : offset + length]
+    image = pil.frombuffer(mode, size, view, 'raw', mode, 0, 1)
+    try:
+        yield image
+    finally:
+        # The mapped pixels must be let go before the block can be closed.
+        image.close()
+        del image
+        view.release()
+        block.close()
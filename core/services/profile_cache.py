@@ -0,0 +1,86 @@
+import hashlib
+import os
+from time import time
+from typing import TYPE_CHECKING
+
+from ..models import WorkDirectory
+from ..utils.constants import PROFILE_CACHE_REL_DIR
+from .global_logger import GlobalLogger, logFunc
+
+# NumPy is only imported once the cache is used, to keep startup light.
+if TYPE_CHECKING:
+    import numpy as np
+
+
+class RowProfileCache:
+    """Keeps per-row detector profiles on disk so reruns skip the pixel scan.
+
+    Entries are keyed by the fingerprint of a work directory's input files and
+    of every setting that changes the scanned pixels. Once the cache grows over
+    max_size_mb, the least recently used entries are evicted first, and entries
+    unused for more than max_age_days (when set) are dropped as well.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str = PROFILE_CACHE_REL_DIR,
+        max_size_mb: int = 256,
+        max_age_days: int = 0,
+    ):
+        self.cache_dir = cache_dir
+        self.max_size = max_size_mb * 1024 * 1024
+        self.max_age = max_age_days * 24 * 60 * 60
+
+    def fingerprint(self, workdirectory: WorkDirectory, **params: any) -> str:
+        """Builds the cache key of a work directory for the given pixel settings."""
+        key = hashlib.sha1()
+        for img_file in workdirectory.input_files:
+            stat = os.stat(os.path.join(workdirectory.input_path, img_file))
+            key.update(f'{img_file}:{stat.st_size}:{stat.st_mtime_ns}\n'.encode())
+        for name, value in sorted(params.items()):
+            key.update(f'{name}={value!r}\n'.encode())
+        return key.hexdigest()
+
+    def load(self, key: str) -> 'np.ndarray | None':
+        import numpy as np
+
+        cache_file = self._cache_file(key)
+        if not os.path.exists(cache_file):
+            return None
+        try:
+            row_profile = np.load(cache_file)
+        except (OSError, ValueError):
+            GlobalLogger.log_warning(f'Unreadable cache entry {key}', 'RowProfileCache')
+            return None
+        # Marks the entry as recently used for the eviction order.
+        os.utime(cache_file)
+        return row_profile
+
+    @logFunc(inclass=True)
+    def save(self, key: str, row_profile: 'np.ndarray'):
+        import numpy as np
+
+        if not os.path.exists(self.cache_dir):
+            os.makedirs(self.cache_dir)
+        np.save(self._cache_file(key), row_profile)
+        self.evict()
+
+    def evict(self):
+        """Removes expired entries, then the oldest ones until under max size."""
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.is_file() and entry.name.endswith('.npy'):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        entries.sort()
+        total_size = sum(size for _, size, _ in entries)
+        now = time()
+        for last_used, size, path in entries:
+            expired = self.max_age and now - last_used > self.max_age
+            if not expired and total_size <= self.max_size:
+                continue
+            os.remove(path)
+            total_size -= size
+
+    def _cache_file(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + '.npy')
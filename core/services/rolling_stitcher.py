@@ -0,0 +1,190 @@
+import os
+from collections import deque
+from typing import Callable
+
+import numpy as np
+from PIL import Image as pil
+
+from ..models import WorkDirectory
+from ..utils.constants import RESAMPLE_QUALITY
+from .canvas import canvas_image, close_canvas_image, new_canvas, paste_rows
+from .global_logger import GlobalLogger, logFunc
+from .image_handler import ImageHandler, _save_image_worker
+from .pixel_buffers import SHARED_MEMORY_HANDOFF, share_images
+from .source_passthrough import SourcePassthrough, copy_source
+from .worker_pool import borrow_executor, runs_in_process
+
+
+class RollingStitcher:
+    def __init__(self, img_handler: ImageHandler):
+        """Stitches work directories in a rolling window of rows.
+
+        Images are loaded and slices saved with the executor of img_handler.
+        """
+        self.img_handler = img_handler
+
+    @logFunc(inclass=True)
+    def run(
+        self,
+        workdirectory: WorkDirectory,
+        img_sizes: list[tuple[int, int]],
+        split_height: int,
+        slice_walk,
+        sliceable_rows: Callable[[pil.Image], np.ndarray],
+        psd_first_layer_only: bool = False,
+        target_width: int = None,
+        resample_quality: RESAMPLE_QUALITY = RESAMPLE_QUALITY.BEST,
+        img_format: str = '.png',
+        quality=100,
+        passthrough: SourcePassthrough = None,
+    ) -> int | None:
+        """Stitches a work directory without ever combining all of its images.
+
+        Images (which must have the planned img_sizes, like for combine_stream)
+        are loaded in order into a buffer of rows as wide as the widest one.
+        New rows are flagged by sliceable_rows, slice_walk (a RollingSliceWalk)
+        picks the slice locations from those flags, every slice is saved as
+        soon as its location is known and only the rows below it are kept. The
+        buffer holds about 2 * split_height rows plus an image, and the slices
+        are the same a detector walking over the same flags would give. Slices
+        that are source files of *passthrough* are copied from them instead.
+
+        Returns the number of saved slices, or None when the directory has to
+        be stitched the regular way: scan steps over 40% of split_height can
+        look above the previous slice, and images not having their planned size
+        can not be placed (anything saved until then is removed again).
+        """
+        if slice_walk.scan_step > 0.4 * split_height:
+            return None
+        if not os.path.exists(workdirectory.output_path):
+            os.makedirs(workdirectory.output_path)
+        width = max(img_width for img_width, _ in img_sizes)
+        capacity = 2 * split_height + max(img_height for _, img_height in img_sizes)
+        rows, _ = new_canvas(width, capacity)
+        flags = np.zeros(capacity, dtype=bool)
+        # Global row of the first buffered row, number of buffered rows
+        top, filled = 0, 0
+        slice_top = 0
+        file_names = []
+        passed_through = 0
+        pending = deque()
+        with borrow_executor(
+            self.img_handler.executor, self.img_handler.max_workers
+        ) as executor:
+            in_process = runs_in_process(executor)
+            max_workers = (
+                getattr(executor, 'max_workers', None) or self.img_handler.max_workers
+            )
+            try:
+                loaded_imgs = self.img_handler.load_ordered(
+                    workdirectory, psd_first_layer_only, target_width, resample_quality
+                )
+                for idx, img in enumerate(loaded_imgs):
+                    if img.size != img_sizes[idx]:
+                        img.close()
+                        loaded_imgs.close()
+                        GlobalLogger.log_warning(
+                            'loaded images differ from their probed sizes, '
+                            'stitching them the regular way',
+                            type(self).__name__,
+                        )
+                        self._finish_saves(pending, 0)
+                        for file_name in file_names:
+                            os.remove(
+                                os.path.join(workdirectory.output_path, file_name)
+                            )
+                        return None
+                    img_width, img_height = img.size
+                    if filled + img_height > capacity:
+                        # Rows above the last slice are not needed anymore
+                        dropped = slice_top - top
+                        rows[: filled - dropped] = rows[dropped:filled]
+                        flags[: filled - dropped] = flags[dropped:filled]
+                        filled -= dropped
+                        top = slice_top
+                    if filled + img_height > capacity:
+                        # A walk going far below split_height needs more rows
+                        capacity = filled + img_height + split_height
+                        rows = np.concatenate(
+                            (rows[:filled], new_canvas(width, capacity - filled)[0])
+                        )
+                        flags = np.concatenate(
+                            (flags[:filled], np.zeros(capacity - filled, dtype=bool))
+                        )
+                    # Buffered rows are reused, narrower images get a black margin
+                    rows[filled : filled + img_height, img_width:] = 0
+                    paste_rows(rows, img, filled)
+                    img.close()
+                    flags[filled : filled + img_height] = sliceable_rows(
+                        canvas_image(rows[filled : filled + img_height])
+                    )
+                    filled += img_height
+                    for location in slice_walk.advance(flags[:filled], top):
+                        file_name = str(f'{len(file_names) + 1:02}') + img_format
+                        full_path = os.path.join(workdirectory.output_path, file_name)
+                        source_file = passthrough and passthrough.source_of(
+                            slice_top, location
+                        )
+                        if source_file:
+                            copy_source(source_file, full_path)
+                            passed_through += 1
+                        else:
+                            self._submit_save(
+                                executor,
+                                in_process,
+                                pending,
+                                rows[slice_top - top : location - top],
+                                full_path,
+                                img_format,
+                                quality,
+                            )
+                        file_names.append(file_name)
+                        slice_top = location
+                        self._finish_saves(pending, max_workers)
+            finally:
+                self._finish_saves(pending, 0)
+        if passed_through:
+            GlobalLogger.log_debug(
+                f'{passed_through} of {len(file_names)} slices passed through '
+                'from their source files',
+                type(self).__name__,
+            )
+        workdirectory.output_files.extend(file_names)
+        return len(file_names)
+
+    def _submit_save(
+        self,
+        executor,
+        in_process: bool,
+        pending: deque,
+        slice_rows: np.ndarray,
+        full_path: str,
+        img_format: str,
+        quality,
+    ):
+        """Copies the rows of a slice out of the buffer and has a worker save them."""
+        height, width = slice_rows.shape[:2]
+        slice_canvas, block = new_canvas(
+            width, height, shared=SHARED_MEMORY_HANDOFF and not in_process
+        )
+        slice_canvas[:] = slice_rows
+        img = canvas_image(slice_canvas, block)
+        copy_block, img_refs = share_images([img], in_process)
+        future = executor.submit(
+            _save_image_worker, (img_refs[0], full_path, img_format, quality)
+        )
+        pending.append((future, img, block, copy_block))
+
+    def _finish_saves(self, pending: deque, max_pending: int):
+        """Waits for the oldest saves until at most max_pending are left."""
+        while len(pending) > max_pending:
+            future, img, block, copy_block = pending.popleft()
+            try:
+                future.result()
+            finally:
+                close_canvas_image(img)
+                if block is not None:
+                    block.unlink()
+                if copy_block is not None:
+                    copy_block.close()
+                    copy_block.unlink()
@@ -0,0 +1,92 @@
+import os
+import shutil
+
+from PIL import Image as pil
+
+from ..models import WorkDirectory
+from ..utils.constants import PHOTOSHOP_FILE_TYPES
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# ioctl cloning a whole file on copy on write file systems (Btrfs, XFS, ...)
+FICLONE = 0x40049409
+EXIF_ORIENTATION = 0x0112
+
+
+def copy_source(source_path: str, full_path: str):
+    """Copies a source file to full_path, as a clone sharing its blocks if possible.
+
+    Output files are never hardlinked: post processing may change them in
+    place, which would change the input files as well.
+    """
+    if fcntl is not None:
+        with open(source_path, 'rb') as source, open(full_path, 'wb') as target:
+            try:
+                fcntl.ioctl(target.fileno(), FICLONE, source.fileno())
+                return
+            except OSError:
+                pass
+    shutil.copyfile(source_path, full_path)
+
+
+class SourcePassthrough:
+    def __init__(
+        self,
+        workdirectory: WorkDirectory,
+        img_sizes: list[tuple[int, int]],
+        img_format: str,
+    ):
+        """Finds the slices of a work directory that are unmodified source files.
+
+        A slice starting and ending at the edges of a source image, which is
+        as wide as the combined image, not resized, RGB and already in the
+        output format, holds the same pixels as that file. Copying the file
+        skips decoding and encoding it again, and lossy files keep their
+        quality. img_sizes are the planned sizes of the loaded images.
+        """
+        self.img_rows = {}
+        metadata = workdirectory.metadata
+        output_format = pil.registered_extensions().get(img_format.lower())
+        if (
+            metadata is None
+            or output_format is None
+            or img_format.lower() in PHOTOSHOP_FILE_TYPES
+        ):
+            return
+        width = max(img_width for img_width, _ in img_sizes)
+        img_top = 0
+        for idx, (img_width, img_height) in enumerate(img_sizes):
+            source = metadata[idx]
+            if (
+                img_width == width
+                and (source.width, source.height) == (img_width, img_height)
+                and source.mode == 'RGB'
+                and source.format == output_format
+            ):
+                self.img_rows[(img_top, img_top + img_height)] = os.path.join(
+                    workdirectory.input_path, workdirectory.input_files[idx]
+                )
+            img_top += img_height
+
+    def source_of(self, upper_limit: int, lower_limit: int) -> str | None:
+        """Gets the source file holding the slice from upper_limit to lower_limit."""
+        source_path = self.img_rows.get((upper_limit, lower_limit))
+        if source_path is None:
+            return None
+        # Viewers apply these on the file, re-encoded slices do not keep them
+        with pil.open(source_path) as image:
+            if 'transparency' in image.info or 'icc_profile' in image.info:
+                return None
+            if image.getexif().get(EXIF_ORIENTATION, 1) != 1:
+                return None
+        return source_path
+
+    def source_files(self, slice_locations: list[int]) -> list[str | None]:
+        """Gets the source file of every slice at slice_locations, or None."""
+        return [
+            self.source_of(slice_locations[index - 1], slice_locations[index])
+            for index in range(1, len(slice_locations))
+        ]
@@ -0,0 +1,191 @@
+import os
+from concurrent.futures import as_completed
+
+from PIL import Image as pil
+
+from ..models import WorkDirectory
+from ..utils.constants import RESAMPLE_QUALITY
+from .global_logger import GlobalLogger, logFunc
+from .image_handler import ImageHandler, _open_image, _write_image
+from .source_passthrough import SourcePassthrough, copy_source
+from .worker_pool import borrow_executor
+
+
+# Module-level functions for multiprocessing (must be picklable)
+def _slice_sources_worker(args: tuple) -> str | None:
+    """Worker function to build a single slice from its source images and save it.
+
+    Returns None instead when a source image does not have its planned size.
+    """
+    (
+        parts,
+        slice_size,
+        full_path,
+        img_format,
+        quality,
+        psd_first_layer_only,
+        target_width,
+        resample_quality,
+    ) = args
+    # Black like the uncovered margin of a combined image
+    slice_img = pil.new('RGB', slice_size)
+    for img_path, img_size, upper_limit, lower_limit, slice_row in parts:
+        image = _open_image(
+            img_path, psd_first_layer_only, target_width, resample_quality
+        )
+        if image.size != img_size:
+            image.close()
+            return None
+        rows = image.crop((0, upper_limit, img_size[0], lower_limit))
+        image.close()
+        # RGBA rows lose their alpha, like pasting them into a combined image
+        slice_img.paste(rows, (0, slice_row))
+    _write_image(slice_img, full_path, img_format, quality)
+    return os.path.basename(full_path)
+
+
+def source_parts(
+    img_sizes: list[tuple[int, int]], slice_locations: list[int]
+) -> list[list[tuple[int, int, int, int]]]:
+    """Gets the rows of the source images covered by every slice.
+
+    Every part is (image index, upper row, lower row, row in the slice), the
+    rows being those the slice would have been cropped from a combined image.
+    """
+    slice_parts = []
+    idx, img_top = 0, 0
+    for index in range(1, len(slice_locations)):
+        upper_limit = slice_locations[index - 1]
+        lower_limit = slice_locations[index]
+        # Skips the images entirely above the slice
+        while img_top + img_sizes[idx][1] <= upper_limit:
+            img_top += img_sizes[idx][1]
+            idx += 1
+        parts = []
+        part_idx, part_top = idx, img_top
+        while part_idx < len(img_sizes) and part_top < lower_limit:
+            img_height = img_sizes[part_idx][1]
+            upper_row = max(upper_limit, part_top)
+            lower_row = min(lower_limit, part_top + img_height)
+            parts.append(
+                (
+                    part_idx,
+                    upper_row - part_top,
+                    lower_row - part_top,
+                    upper_row - upper_limit,
+                )
+            )
+            part_top += img_height
+            part_idx += 1
+        slice_parts.append(parts)
+    return slice_parts
+
+
+class SourceSlicer:
+    def __init__(self, img_handler: ImageHandler):
+        """Saves slices built straight from the source images of work directories.
+
+        Slices are built and saved with the executor of img_handler.
+        """
+        self.img_handler = img_handler
+
+    @logFunc(inclass=True)
+    def run(
+        self,
+        workdirectory: WorkDirectory,
+        img_sizes: list[tuple[int, int]],
+        slice_locations: list[int],
+        psd_first_layer_only: bool = False,
+        target_width: int = None,
+        resample_quality: RESAMPLE_QUALITY = RESAMPLE_QUALITY.BEST,
+        img_format: str = '.png',
+        quality=100,
+        passthrough: SourcePassthrough = None,
+    ) -> int | None:
+        """Saves the slices at slice_locations without combining the images.
+
+        Slice locations that only depend on the image heights (like those of
+        the direct slicing detector) are known from the planned img_sizes
+        alone. Every slice is then built by its own worker, which decodes only
+        the one or few images it covers and pastes their overlapping rows, so
+        the output is the same as slicing a combined image. Slices that are
+        source files of *passthrough* are copied from them instead.
+
+        Returns the number of saved slices, or None when the directory has to
+        be stitched the regular way: slices much shorter than the images would
+        decode every image many times, and images not having their planned size
+        can not be placed (anything saved is removed again).
+        """
+        slice_parts = source_parts(img_sizes, slice_locations)
+        decoded_rows = sum(
+            img_sizes[idx][1] for parts in slice_parts for idx, *_ in parts
+        )
+        if decoded_rows > 2 * sum(img_height for _, img_height in img_sizes):
+            return None
+        if not os.path.exists(workdirectory.output_path):
+            os.makedirs(workdirectory.output_path)
+        width = max(img_width for img_width, _ in img_sizes)
+        file_names = [str(f'{i+1:02}') + img_format for i in range(len(slice_parts))]
+        source_files = [None] * len(slice_parts)
+        if passthrough:
+            source_files = passthrough.source_files(slice_locations)
+        for source_file, file_name in zip(source_files, file_names):
+            if source_file:
+                copy_source(
+                    source_file, os.path.join(workdirectory.output_path, file_name)
+                )
+        args_list = [
+            (
+                [
+                    (
+                        os.path.join(
+                            workdirectory.input_path, workdirectory.input_files[idx]
+                        ),
+                        img_sizes[idx],
+                        upper_row,
+                        lower_row,
+                        slice_row,
+                    )
+                    for idx, upper_row, lower_row, slice_row in parts
+                ],
+                (width, slice_locations[index + 1] - slice_locations[index]),
+                os.path.join(workdirectory.output_path, file_name),
+                img_format,
+                quality,
+                psd_first_layer_only,
+                target_width,
+                resample_quality,
+            )
+            for index, (parts, file_name) in enumerate(zip(slice_parts, file_names))
+            if not source_files[index]
+        ]
+        with borrow_executor(
+            self.img_handler.executor, self.img_handler.max_workers
+        ) as executor:
+            futures = [
+                executor.submit(_slice_sources_worker, args) for args in args_list
+            ]
+            mismatched = False
+            for future in as_completed(futures):
+                if future.result() is None:
+                    mismatched = True
+        if mismatched:
+            GlobalLogger.log_warning(
+                'loaded images differ from their probed sizes, '
+                'stitching them the regular way',
+                type(self).__name__,
+            )
+            for file_name in file_names:
+                full_path = os.path.join(workdirectory.output_path, file_name)
+                if os.path.exists(full_path):
+                    os.remove(full_path)
+            return None
+        passed_through = len(file_names) - len(args_list)
+        if passed_through:
+            GlobalLogger.log_debug(
+                f'{passed_through} of {len(file_names)} slices passed through '
+                'from their source files',
+                type(self).__name__,
+            )
+        workdirectory.output_files.extend(file_names)
+        return len(file_names)
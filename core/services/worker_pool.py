@@ -0,0 +1,230 @@
+import multiprocessing
+from bisect import bisect_left
+from concurrent.futures import (
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    as_completed,
+)
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import nullcontext
+from itertools import accumulate
+from multiprocessing import cpu_count
+from time import perf_counter
+from typing import Callable, Iterator
+
+from ..utils.constants import EXECUTOR_BACKEND
+from .global_logger import GlobalLogger
+from .pixel_buffers import prepare_shared_memory
+
+# Batches handed out per worker, a few per worker evens out uneven batches.
+BATCHES_PER_WORKER = 4
+# Imported once by the fork server, so every worker forked from it starts warm.
+# Modules that fail to import (like an optional dependency) are skipped.
+WORKER_PRELOAD_MODULES = [
+    'numpy',
+    'PIL.Image',
+    'psd_tools',
+    'core.services.image_handler',
+    'core.services.image_manipulator',
+    'core.detectors.parallel_profile',
+]
+
+
+# Module-level function for multiprocessing (must be picklable)
+def _run_batch(args: tuple) -> list:
+    """Worker function to run a task over a batch of arguments, in order."""
+    fn, batch = args
+    return [fn(item) for item in batch]
+
+
+class SerialExecutor(Executor):
+    """Runs every task right away in the calling thread."""
+
+    max_workers = 1
+    in_process = True
+
+    def submit(self, fn, /, *args, **kwargs):
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as error:
+            future.set_exception(error)
+        return future
+
+
+class WorkerPool(Executor):
+    def __init__(
+        self,
+        max_workers: int = None,
+        start_method: str = None,
+        backend: EXECUTOR_BACKEND | str = EXECUTOR_BACKEND.PROCESS,
+    ):
+        """Long lived worker pool shared by all stages and work directories of a run.
+
+        The process backend runs tasks in worker processes, the thread backend in
+        threads of this process (PIL releases the GIL while decoding, encoding
+        and resizing, and nothing has to be handed between processes) and the
+        serial backend runs them one by one as they are submitted. Workers are
+        started on first use and kept until shutdown. Where available worker
+        processes are forked from a fork server with the heavy modules
+        preloaded, otherwise the platform default start method is used.
+        """
+        if isinstance(backend, str):
+            backend = EXECUTOR_BACKEND[backend.upper()]
+        if backend == EXECUTOR_BACKEND.AUTO:
+            # Until autotune picks one, behave like the default backend.
+            backend = EXECUTOR_BACKEND.PROCESS
+        self.backend = backend
+        self.max_workers = max_workers or cpu_count()
+        if backend == EXECUTOR_BACKEND.SERIAL:
+            self.max_workers = 1
+        if (
+            start_method is None
+            and 'forkserver' in multiprocessing.get_all_start_methods()
+        ):
+            start_method = 'forkserver'
+        self.start_method = start_method
+        self._executor = None
+
+    @property
+    def in_process(self) -> bool:
+        """True when tasks run in this process and can share objects directly."""
+        return self.backend != EXECUTOR_BACKEND.PROCESS
+
+    def _start(self) -> Executor:
+        if self.backend == EXECUTOR_BACKEND.SERIAL:
+            return SerialExecutor()
+        if self.backend == EXECUTOR_BACKEND.THREAD:
+            return ThreadPoolExecutor(max_workers=self.max_workers)
+        prepare_shared_memory()
+        mp_context = multiprocessing.get_context(self.start_method)
+        if self.start_method == 'forkserver':
+            mp_context.set_forkserver_preload(WORKER_PRELOAD_MODULES)
+        GlobalLogger.log_debug(
+            f'starting {self.max_workers} workers ({mp_context.get_start_method()})',
+            type(self).__name__,
+        )
+        return ProcessPoolExecutor(max_workers=self.max_workers, mp_context=mp_context)
+
+    def submit(self, fn, /, *args, **kwargs):
+        if self._executor is None:
+            self._executor = self._start()
+        try:
+            return self._executor.submit(fn, *args, **kwargs)
+        except BrokenProcessPool:
+            # A crashed worker breaks the whole pool, later work gets a new one.
+            GlobalLogger.log_warning(
+                'restarting broken worker pool', type(self).__name__
+            )
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = self._start()
+            return self._executor.submit(fn, *args, **kwargs)
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=cancel_futures)
+            self._executor = None
+
+    def autotune(
+        self, sample_task: Callable[[Executor], None], max_workers: int = None
+    ) -> tuple[EXECUTOR_BACKEND, int]:
+        """Switches to the backend and worker count that ran sample_task fastest.
+
+        sample_task is run twice with a pool of every candidate and only the
+        second, warm run is timed. Without max_workers both the CPU count and
+        half of it are tried for the process and thread backends.
+        """
+        worker_counts = [max_workers]
+        if not max_workers:
+            worker_counts = sorted({max(1, cpu_count() // 2), cpu_count()})
+        candidates = [
+            (backend, count)
+            for backend in (EXECUTOR_BACKEND.PROCESS, EXECUTOR_BACKEND.THREAD)
+            for count in worker_counts
+        ]
+        candidates.append((EXECUTOR_BACKEND.SERIAL, 1))
+        timings = {}
+        for backend, count in candidates:
+            candidate = WorkerPool(count, self.start_method, backend)
+            try:
+                sample_task(candidate)
+                start = perf_counter()
+                sample_task(candidate)
+                timings[(backend, count)] = perf_counter() - start
+            finally:
+                candidate.shutdown()
+        GlobalLogger.log_debug(
+            'autotune timings: '
+            + ', '.join(
+                f'{backend.name.lower()}x{count}={timing:.3f}s'
+                for (backend, count), timing in timings.items()
+            ),
+            type(self).__name__,
+        )
+        self.shutdown()
+        self.backend, self.max_workers = min(timings, key=timings.get)
+        return self.backend, self.max_workers
+
+
+def runs_in_process(executor: Executor) -> bool:
+    """True when an executor runs tasks in this process, like a thread pool."""
+    return getattr(
+        executor,
+        'in_process',
+        isinstance(executor, (ThreadPoolExecutor, SerialExecutor)),
+    )
+
+
+def borrow_executor(executor: Executor = None, max_workers: int = None):
+    """Gets a context for a shared executor, or for a process pool for one call only.
+
+    Leaving the context never shuts a shared executor down, its owner does.
+    """
+    if executor is not None:
+        return nullcontext(executor)
+    prepare_shared_memory()
+    return ProcessPoolExecutor(max_workers=max_workers or cpu_count())
+
+
+def plan_batches(costs: list[float], max_workers: int) -> list[range]:
+    """Splits tasks into consecutive batches of about the same estimated cost.
+
+    Up to BATCHES_PER_WORKER batches are planned per worker, so a handful of
+    tasks still get one batch each while hundreds of small ones are grouped.
+    """
+    count = len(costs)
+    batch_count = min(count, max(1, max_workers) * BATCHES_PER_WORKER)
+    if batch_count >= count:
+        return [range(index, index + 1) for index in range(count)]
+    cumulative = list(accumulate(max(cost, 1) for cost in costs))
+    total = cumulative[-1]
+    edges = [0]
+    for batch in range(1, batch_count):
+        edge = bisect_left(cumulative, total * batch / batch_count) + 1
+        if edges[-1] < edge < count:
+            edges.append(edge)
+    edges.append(count)
+    return [range(top, bottom) for top, bottom in zip(edges[:-1], edges[1:])]
+
+
+def submit_batches(
+    executor: Executor,
+    fn: Callable,
+    args_list: list,
+    costs: list[float],
+    max_workers: int = None,
+) -> Iterator[tuple[int, any]]:
+    """Runs fn over args_list in batches planned by plan_batches.
+
+    Each batch crosses to a worker and back once. Yields (index, result) pairs
+    as batches complete, in order within every batch.
+    """
+    max_workers = getattr(executor, 'max_workers', None) or max_workers or cpu_count()
+    future_to_batch = {
+        executor.submit(_run_batch, (fn, [args_list[i] for i in batch])): batch
+        for batch in plan_batches(costs, max_workers)
+    }
+    for future in as_completed(future_to_batch):
+        yield from zip(future_to_batch[future], future.result())
@@ -1,8 +1,9 @@
-from enum import IntEnum
+from enum import IntEnum, IntFlag
 
 # Static Variables
 LOG_REL_DIR = '__logs__'
 SETTINGS_REL_DIR = '__settings__'
+PROFILE_CACHE_REL_DIR = '__cache__'
 OUTPUT_SUFFIX = ' [stitched]'
 POSTPROCESS_SUFFIX = ' [processed]'
 SUPPORTED_IMG_TYPES = (
@@ -30,6 +31,48 @@ class WIDTH_ENFORCEMENT(IntEnum):
     MANUAL = 2
 
 
+class RESAMPLE_QUALITY(IntEnum):
+    # Lanczos straight from the source size, JPEGs are decoded at full size.
+    BEST = 0
+    # Integer factor reduction down to 2x the target size, then Lanczos. Wide
+    # JPEGs are decoded at a reduced scale first.
+    BALANCED = 1
+    # Integer factor reduction as far as possible, then Bilinear. Wide JPEGs
+    # are decoded at a reduced scale first.
+    FAST = 2
+
+
 class DETECTION_TYPE(IntEnum):
     NO_DETECTION = 0
     PIXEL_COMPARISON = 1
+    INDEXED_PIXEL_COMPARISON = 2
+    MULTI_RESOLUTION = 3
+    UNIFORM_GUTTER = 4
+
+
+class SLICE_PLANNER(IntEnum):
+    GREEDY = 0
+    OPTIMAL = 1
+
+
+class EXECUTOR_BACKEND(IntEnum):
+    PROCESS = 0
+    THREAD = 1
+    SERIAL = 2
+    AUTO = 3
+
+
+class DETECTOR_CAPABILITY(IntFlag):
+    NONE = 0
+    # Only the canvas height is read, no pixels at all (see slice_locations).
+    HEIGHTS_ONLY = 1
+    # Rows are profiled in bands by worker processes, which read the combined
+    # image in place when it is in shared memory (see shares_canvas).
+    ROW_BANDS = 2
+    # Rows can be read from a VirtualCanvas of the source images, no combining.
+    VIRTUAL_CANVAS = 4
+    # Slice points come from the pixel comparison walk over rows judged on their
+    # own (sliceable_rows), so a chapter can be stitched in a rolling window.
+    GREEDY_WALK = 8
+    # Row profiles are read from and saved to a profile_cache under cache_key.
+    PROFILE_CACHE = 16
@@ -8,7 +8,7 @@ from PySide6.QtWidgets import QApplication, QDialog, QFileDialog, QMessageBox
 from assets.SmartStitchLogo import icon
 from core.models import WorkDirectory
 from core.services import SettingsHandler, AdvancedPsdMerger, PostProcessRunner
-from core.utils.constants import OUTPUT_SUFFIX, POSTPROCESS_SUFFIX
+from core.utils.constants import DETECTION_TYPE, OUTPUT_SUFFIX, POSTPROCESS_SUFFIX
 from gui.process import GuiStitchProcess
 
 SCRIPT_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
@@ -418,7 +418,7 @@ def detector_type_changed(save=True):
     detector_type = MainWindow.detectorTypeDropdown.currentIndex()
     if save:
         settings.save("detector_type", detector_type)
-    if detector_type == 1:
+    if detector_type != DETECTION_TYPE.NO_DETECTION:
         MainWindow.detectorSensitvityWrapper.setHidden(False)
         MainWindow.scanStepWrapper.setHidden(False)
         MainWindow.ignoreMarginWrapper.setHidden(False)
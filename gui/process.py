@@ -2,15 +2,18 @@ import gc
 import os
 from time import time
 
-from core.detectors import select_detector
 from core.services import (
     DirectoryExplorer,
+    DirectoryStitcher,
     ImageHandler,
     ImageManipulator,
     PostProcessRunner,
     SettingsHandler,
+    WorkerPool,
     logFunc,
 )
+from core.services.directory_stitcher import STAGE_MESSAGES
+from core.utils.constants import EXECUTOR_BACKEND
 
 
 class GuiStitchProcess:
@@ -26,11 +29,27 @@ class GuiStitchProcess:
     def run(self, **kwargs: dict[str:any]):
         # Initialize Services
         settings = SettingsHandler()
-        explorer = DirectoryExplorer()
-        img_handler = ImageHandler()
-        img_manipulator = ImageManipulator()
+        explorer = DirectoryExplorer(probe_headers=True)
+        worker_pool = WorkerPool(
+            max_workers=settings.load("max_workers"),
+            backend=settings.load("executor_backend"),
+        )
+        img_handler = ImageHandler(executor=worker_pool)
+        img_manipulator = ImageManipulator(
+            executor=worker_pool,
+            canvas_memory_limit=settings.load("canvas_memory_limit"),
+            scratch_directory=settings.load("scratch_directory"),
+        )
         postprocess_runner = PostProcessRunner()
-        detector = select_detector(detection_type=settings.load("detector_type"))
+        dir_stitcher = DirectoryStitcher(
+            img_handler,
+            img_manipulator,
+            settings.load("detector_type"),
+            slice_planner=settings.load("slice_planner"),
+            rolling_window=settings.load("rolling_window"),
+            profile_cache_size=settings.load("profile_cache_size"),
+            profile_cache_age=settings.load("profile_cache_age"),
+        )
         project_root = os.path.dirname(os.path.dirname(__file__))
         comiczip_script = os.path.join(project_root, "scripts", "comiczip.py")
         input_path = kwargs.get("input_path", "")
@@ -78,102 +97,106 @@ class GuiStitchProcess:
         )
         percentage += step_percentages.get("explore")
         dir_iteration = 1
-        for dir in input_dirs:
-            status_func(
-                percentage,
-                'Working - [{iteration}/{count}] Preparing & loading images Into memory'.format(
-                    iteration=dir_iteration, count=input_dirs_count
-                ),
-            )
-            imgs = img_handler.load(dir, psd_first_layer_only=psd_first_layer_only)
-            imgs = img_manipulator.resize(
-                imgs, settings.load("enforce_type"), settings.load("enforce_width")
-            )
-            percentage += step_percentages.get("load") / float(input_dirs_count)
-            status_func(
-                percentage,
-                'Working - [{iteration}/{count}] Combining images into a single combined image'.format(
-                    iteration=dir_iteration, count=input_dirs_count
-                ),
-            )
-            combined_img = img_manipulator.combine(imgs)
-            percentage += step_percentages.get("combine") / float(input_dirs_count)
-            status_func(
-                percentage,
-                'Working - [{iteration}/{count}] Detecting & selecting valid slicing points'.format(
-                    iteration=dir_iteration, count=input_dirs_count
-                ),
-            )
-            slice_points = detector.run(
-                combined_img,
-                settings.load("split_height"),
-                sensitivity=settings.load("senstivity"),
-                ignorable_pixels=settings.load("ignorable_pixels"),
-                scan_step=settings.load("scan_step"),
-            )
-            percentage += step_percentages.get("detect") / float(input_dirs_count)
-            status_func(
-                percentage,
-                'Working - [{iteration}/{count}] Generating sliced output images in memory'.format(
-                    iteration=dir_iteration, count=input_dirs_count
-                ),
-            )
-            imgs = img_manipulator.slice(combined_img, slice_points)
-            percentage += step_percentages.get("slice") / float(input_dirs_count)
-            status_func(
-                percentage,
-                'Working - [{iteration}/{count}] Saving output images to storage (parallel)'.format(
-                    iteration=dir_iteration, count=input_dirs_count
-                ),
-            )
-            img_count = len(imgs)
-            # Use parallel save_all for better performance
-            img_handler.save_all(
-                dir,
-                imgs,
-                img_format=settings.load("output_type"),
-                quality=settings.load("lossy_quality"),
-            )
-            percentage += step_percentages.get("save") / float(input_dirs_count)
+        current_step = None
+
+        def report_stage(stage: str):
+            # A stage starting ends the previous one, the paths saving slices
+            # straight away are only accounted for once the directory is done.
+            nonlocal percentage, current_step
+            if current_step:
+                percentage += step_percentages.get(current_step) / float(
+                    input_dirs_count
+                )
+            current_step = stage if stage in step_percentages else None
             status_func(
                 percentage,
-                'Working - [{iteration}/{count}] {count_imgs} images saved successfully'.format(
+                'Working - [{iteration}/{count}] {message}'.format(
                     iteration=dir_iteration,
                     count=input_dirs_count,
-                    count_imgs=img_count,
+                    message=STAGE_MESSAGES[stage],
                 ),
             )
-            gc.collect()
-            if has_postprocess:
+
+        try:
+            if (
+                settings.load("executor_backend") == EXECUTOR_BACKEND.AUTO
+                and input_dirs
+            ):
                 status_func(
                     percentage,
-                    'Working - [{iteration}/{count}] Running post process on output files'.format(
-                        iteration=dir_iteration,
-                        count=input_dirs_count,
+                    'Working - Benchmarking executor backends on a sample of the images',
+                )
+                worker_pool.autotune(
+                    img_handler.sample_loader(
+                        input_dirs[0], psd_first_layer_only=psd_first_layer_only
                     ),
+                    settings.load("max_workers"),
                 )
-                postprocess_runner.run(
-                    workdirectory=dir,
-                    postprocess_app=settings.load("postprocess_app"),
-                    postprocess_args=settings.load("postprocess_args"),
-                    console_func=console_func,
+            for dir in input_dirs:
+                dir_percentage = percentage
+                current_step = None
+                img_count = dir_stitcher.run(
+                    dir,
+                    split_height=settings.load("split_height"),
+                    sensitivity=settings.load("senstivity"),
+                    ignorable_pixels=settings.load("ignorable_pixels"),
+                    scan_step=settings.load("scan_step"),
+                    enforce_type=settings.load("enforce_type"),
+                    enforce_width=settings.load("enforce_width"),
+                    resample_quality=settings.load("resample_quality"),
+                    img_format=settings.load("output_type"),
+                    quality=settings.load("lossy_quality"),
+                    psd_first_layer_only=psd_first_layer_only,
+                    passthrough_sources=settings.load("passthrough_sources"),
+                    stage_func=report_stage,
                 )
-                percentage += step_percentages.get("postprocess") / float(input_dirs_count)
-            if run_comiczip:
+                percentage = dir_percentage + sum(
+                    step_percentages.get(step)
+                    for step in ("load", "combine", "detect", "slice", "save")
+                ) / float(input_dirs_count)
                 status_func(
                     percentage,
-                    'Working - [{iteration}/{count}] Running ComicZip on output files'.format(
+                    'Working - [{iteration}/{count}] {count_imgs} images saved successfully'.format(
                         iteration=dir_iteration,
                         count=input_dirs_count,
+                        count_imgs=img_count,
                     ),
                 )
-                postprocess_runner.run(
-                    workdirectory=dir,
-                    postprocess_app="python",
-                    postprocess_args=f"{comiczip_script} -i [stitched] -o [processed]",
-                    console_func=console_func,
-                )
-            dir_iteration += 1
+                gc.collect()
+                if has_postprocess:
+                    status_func(
+                        percentage,
+                        'Working - [{iteration}/{count}] Running post process on output files'.format(
+                            iteration=dir_iteration,
+                            count=input_dirs_count,
+                        ),
+                    )
+                    postprocess_runner.run(
+                        workdirectory=dir,
+                        postprocess_app=settings.load("postprocess_app"),
+                        postprocess_args=settings.load("postprocess_args"),
+                        console_func=console_func,
+                    )
+                    percentage += step_percentages.get("postprocess") / float(
+                        input_dirs_count
+                    )
+                if run_comiczip:
+                    status_func(
+                        percentage,
+                        'Working - [{iteration}/{count}] Running ComicZip on output files'.format(
+                            iteration=dir_iteration,
+                            count=input_dirs_count,
+                        ),
+                    )
+                    postprocess_runner.run(
+                        workdirectory=dir,
+                        postprocess_app="python",
+                        postprocess_args=f"{comiczip_script} -i [stitched] -o [processed]",
+                        console_func=console_func,
+                    )
+                dir_iteration += 1
+        finally:
+            worker_pool.shutdown()
         end_time = time()
         percentage = 100
         status_func(
@@ -0,0 +1,74 @@
+import argparse
+from time import perf_counter
+
+from core.detectors import select_detector
+from core.services import DirectoryExplorer, ImageHandler, ImageManipulator
+
+
+def getargs():
+    parser = argparse.ArgumentParser(
+        description="Compares a detector's speed and slice points against another."
+    )
+    parser.add_argument("-i", dest="input_folder", required=True)
+    parser.add_argument("-sh", dest="split_height", type=int, default=5000)
+    parser.add_argument("-dt", dest="detection_type", default="multires")
+    parser.add_argument("-ref", dest="reference_type", default="pixel")
+    parser.add_argument("-s", dest="sensitivity", type=int, default=90)
+    parser.add_argument("-ip", dest="ignorable_pixels", type=int, default=5)
+    parser.add_argument("-sl", dest="scan_step", type=int, default=5)
+    return parser.parse_args()
+
+
+def timed_run(detector, combined_img, args) -> tuple[list[int], float]:
+    start_time = perf_counter()
+    slice_points = detector.run(
+        combined_img,
+        args.split_height,
+        sensitivity=args.sensitivity,
+        ignorable_pixels=args.ignorable_pixels,
+        scan_step=args.scan_step,
+    )
+    return slice_points, perf_counter() - start_time
+
+
+def compare_slice_points(reference: list[int], candidate: list[int]) -> dict:
+    """Accuracy of candidate slice points measured against the reference ones."""
+    offsets = [min(abs(point - ref) for ref in reference) for point in candidate]
+    return {
+        "exact": sum(1 for offset in offsets if offset == 0) / len(candidate),
+        "mean_offset": sum(offsets) / len(offsets),
+        "max_offset": max(offsets),
+    }
+
+
+def main() -> None:
+    args = getargs()
+    img_handler = ImageHandler()
+    img_manipulator = ImageManipulator()
+    reference = select_detector(args.reference_type)
+    candidate = select_detector(args.detection_type)
+    total_ref_time = total_time = 0.0
+    for work_dir in DirectoryExplorer().run(input=args.input_folder):
+        combined_img = img_manipulator.combine(img_handler.load(work_dir))
+        ref_points, ref_time = timed_run(reference, combined_img, args)
+        points, run_time = timed_run(candidate, combined_img, args)
+        total_ref_time += ref_time
+        total_time += run_time
+        accuracy = compare_slice_points(ref_points, points)
+        print(
+            f"{work_dir.input_path} | {combined_img.size[0]}x{combined_img.size[1]}"
+            f" | {args.reference_type}: {len(ref_points)} slices {ref_time:.3f}s"
+            f" | {args.detection_type}: {len(points)} slices {run_time:.3f}s"
+            f" | exact {accuracy['exact']:.1%}"
+            f" mean offset {accuracy['mean_offset']:.1f}px"
+            f" max offset {accuracy['max_offset']}px"
+        )
+        combined_img.close()
+    print(
+        f"Total | {args.reference_type}: {total_ref_time:.3f}s"
+        f" | {args.detection_type}: {total_time:.3f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
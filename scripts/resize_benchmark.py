@@ -0,0 +1,83 @@
+import argparse
+import math
+from time import perf_counter
+
+import numpy as np
+
+from core.services import DirectoryExplorer, ImageHandler, ImageManipulator
+from core.utils.constants import RESAMPLE_QUALITY, WIDTH_ENFORCEMENT
+
+
+def getargs():
+    parser = argparse.ArgumentParser(
+        description="Compares the speed and quality of width enforcement for every resample quality."
+    )
+    parser.add_argument("-i", dest="input_folder", required=True)
+    parser.add_argument("-cw", dest="custom_width", type=int, default=720)
+    return parser.parse_args()
+
+
+def mean_squared_error(reference, candidate) -> float:
+    reference = np.asarray(reference.convert('RGB'), dtype=np.float64)
+    candidate = np.asarray(candidate.convert('RGB'), dtype=np.float64)
+    return float(np.mean((reference - candidate) ** 2))
+
+
+def psnr(mse: float) -> float:
+    """Peak signal to noise ratio for a mean squared error, in dB."""
+    return math.inf if mse == 0 else 10 * math.log10(255**2 / mse)
+
+
+def timed_load(img_handler, work_dir, target_width, resample_quality):
+    start_time = perf_counter()
+    imgs = img_handler.load(
+        work_dir, target_width=target_width, resample_quality=resample_quality
+    )
+    return imgs, perf_counter() - start_time
+
+
+def main() -> None:
+    args = getargs()
+    img_handler = ImageHandler()
+    img_manipulator = ImageManipulator()
+    total_ref_time = 0.0
+    total_times = {quality: 0.0 for quality in RESAMPLE_QUALITY}
+    for work_dir in DirectoryExplorer().run(input=args.input_folder):
+        # Reference is a full size decode, then the best quality resize
+        start_time = perf_counter()
+        ref_imgs = img_manipulator.resize(
+            img_handler.load(work_dir), WIDTH_ENFORCEMENT.MANUAL, args.custom_width
+        )
+        ref_time = perf_counter() - start_time
+        total_ref_time += ref_time
+        print(
+            f"{work_dir.input_path} | {len(ref_imgs)} images | full decode: {ref_time:.3f}s"
+        )
+        for quality in RESAMPLE_QUALITY:
+            imgs, run_time = timed_load(
+                img_handler, work_dir, args.custom_width, quality
+            )
+            total_times[quality] += run_time
+            errors = [
+                mean_squared_error(ref_img, img) for ref_img, img in zip(ref_imgs, imgs)
+            ]
+            print(
+                f"  {quality.name.lower()}: {run_time:.3f}s"
+                f" | PSNR worst {psnr(max(errors)):.2f}dB"
+                f" overall {psnr(sum(errors) / len(errors)):.2f}dB"
+            )
+            for img in imgs:
+                img.close()
+        for img in ref_imgs:
+            img.close()
+    print(
+        f"Total | full decode: {total_ref_time:.3f}s | "
+        + " | ".join(
+            f"{quality.name.lower()}: {total_times[quality]:.3f}s"
+            for quality in RESAMPLE_QUALITY
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()